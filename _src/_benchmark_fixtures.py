@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import itertools
+import os
+import pickle
+import shutil
+
+import numpy as np
+
+from chpobench import HPOBench, HPOLib, JAHSBench201
+from chpobench.base import _load_discrete_spaces
+
+
+SEARCH_SPACES = _load_discrete_spaces()
+HPOLIB_DATASET = "parkinsons_telemonitoring"
+HPOBENCH_DATASET = "australian"
+JAHS_DATASET = "cifar10"
+# The real pickles of HPOLib have 100 epochs, but they take a few GB in memory.
+HPOLIB_EPOCHS = list(range(10, 101, 10))
+HPOBENCH_EPOCHS = [3, 9, 27, 81, 243]
+
+
+def _indices(space: dict[str, list]) -> list[str]:
+    # The same keys as the real pickles, i.e. the concatenated choice indices.
+    return [
+        "".join(map(str, codes))
+        for codes in itertools.product(*(range(len(vs)) for vs in space.values()))
+    ]
+
+
+def make_hpolib_fixture(
+    data_dir: str,
+    epochs: list[int] = HPOLIB_EPOCHS,
+    seed: int = 0,
+    n_configs: int | None = None,
+) -> None:
+    # n_configs keeps only a random subset of the configs, e.g. for the unit tests.
+    rng = np.random.RandomState(seed)
+    indices = _indices(SEARCH_SPACES["hpolib"])
+    if n_configs is not None:
+        subset = rng.choice(len(indices), size=n_configs, replace=False)
+        indices = [indices[i] for i in np.sort(subset).tolist()]
+    n_seeds = HPOLib._N_SEEDS
+    valid_mse = rng.random_sample((len(indices), n_seeds, len(epochs)))
+    runtime = rng.random_sample((len(indices), n_seeds)) * 100.0
+    n_params = rng.randint(100, 100000, size=len(indices))
+    data = {
+        index: {
+            "valid_mse": [dict(zip(epochs, vals)) for vals in valid_mse[i].tolist()],
+            "runtime": runtime[i].tolist(),
+            "n_params": int(n_params[i]),
+        }
+        for i, index in enumerate(indices)
+    }
+    with open(os.path.join(data_dir, f"{HPOLIB_DATASET}.pkl"), mode="wb") as f:
+        pickle.dump(data, f)
+
+    HPOLib.create_dense_store(data_dir, HPOLIB_DATASET)
+
+
+def make_hpobench_fixture(data_dir: str, seed: int = 0) -> None:
+    rng = np.random.RandomState(seed)
+    indices = _indices(SEARCH_SPACES["hpobench"])
+    shape = (len(indices), HPOBench._N_SEEDS, len(HPOBENCH_EPOCHS))
+    metrics = {
+        "bal_acc": rng.random_sample(shape),
+        "runtime": rng.random_sample(shape) * 10.0,
+        "f1": rng.random_sample(shape),
+        "precision": rng.random_sample(shape),
+    }
+    data = {
+        index: {
+            key: [dict(zip(HPOBENCH_EPOCHS, v)) for v in vals[i].tolist()]
+            for key, vals in metrics.items()
+        }
+        for i, index in enumerate(indices)
+    }
+    with open(os.path.join(data_dir, f"{HPOBENCH_DATASET}.pkl"), mode="wb") as f:
+        pickle.dump(data, f)
+
+    HPOBench.create_dense_store(data_dir, HPOBENCH_DATASET)
+
+
+def make_jahs_fixture(data_dir: str, seed: int = 0) -> None:
+    # The same shards as `_src/_collect_jahs.py` for the tabular mode.
+    rng = np.random.RandomState(seed)
+    shard_dir = os.path.join(data_dir, f"{JAHS_DATASET}_shards")
+    n_rows = len(_indices(SEARCH_SPACES["jahs-bench-201"]))
+    for shard in range(16):
+        path = os.path.join(shard_dir, f"{shard:02d}")
+        os.makedirs(path, exist_ok=True)
+        cols = {
+            "valid-err": np.round(rng.uniform(5.0, 90.0, size=n_rows), 2),
+            "runtime": np.floor(rng.uniform(1000.0, 20000.0, size=n_rows)),
+            "size_MB": np.round(rng.uniform(0.001, 1.5, size=n_rows), 5),
+        }
+        for key, vals in cols.items():
+            np.save(os.path.join(path, f"{key}.npy"), vals.astype(np.float32))
+
+    JAHSBench201.create_grid_store(data_dir, JAHS_DATASET, grid_path=shard_dir)
+    shutil.rmtree(shard_dir)
+
+
+def make_fixtures(data_dir: str) -> None:
+    os.makedirs(data_dir, exist_ok=True)
+    for dataset_name, make_fixture in [
+        (HPOLIB_DATASET, make_hpolib_fixture),
+        (HPOBENCH_DATASET, make_hpobench_fixture),
+        (JAHS_DATASET, make_jahs_fixture),
+    ]:
+        if os.path.exists(os.path.join(data_dir, f"{dataset_name}_constraint_index")):
+            continue
+
+        print(f"Create the fixture of {dataset_name} in {data_dir}")
+        make_fixture(data_dir)
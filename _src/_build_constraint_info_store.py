@@ -0,0 +1,7 @@
+from chpobench.constraint_info import save_constraint_info_store
+
+
+if __name__ == "__main__":
+    # The collection scripts rebuild the store by themselves. Run this script after editing
+    # `chpobench/metadata/*.csv` by hand.
+    save_constraint_info_store()
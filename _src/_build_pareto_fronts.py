@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import time
+from argparse import ArgumentParser
+
+import chpobench
+
+
+# The kwargs to load the population of each benchmark without unpickling the raw data.
+BENCH_KWARGS = {
+    "HPOLib": {"backend": "mmap"},
+    "HPOBench": {"backend": "mmap"},
+    "JAHSBench201": {"mode": "tabular"},
+}
+
+
+if __name__ == "__main__":
+    # `create_dense_store` and `create_grid_store` already save the index. Run this script for the
+    # stores created before, e.g. `python -m _src._build_pareto_fronts --bench HPOLib --data-path ...`
+    parser = ArgumentParser()
+    parser.add_argument("--bench", choices=list(BENCH_KWARGS), required=True)
+    parser.add_argument("--data-path", type=str, required=True)
+    parser.add_argument("--dataset-names", type=str, nargs="*", default=None)
+    args = parser.parse_args()
+
+    bench_cls = getattr(chpobench, args.bench)
+    dataset_names = (
+        bench_cls.dataset_names if args.dataset_names is None else args.dataset_names
+    )
+    for dataset_name in dataset_names:
+        start = time.time()
+        bench = bench_cls(
+            data_path=args.data_path,
+            dataset_name=dataset_name,
+            quantiles={},
+            **BENCH_KWARGS[args.bench],
+        )
+        bench.save_pareto_front_index()
+        print(
+            f"Saved the Pareto front of {dataset_name} in {time.time() - start:.1f} sec"
+        )
@@ -4,13 +4,14 @@ import itertools
 import json
 import os
 import pickle
+from argparse import ArgumentParser
 from dataclasses import dataclass
 
 import numpy as np
 
 import pandas as pd
 
-from _src._collector import Collector, ObjectiveNames
+from _src._collector import ObjectiveNames, build_databases
 
 
 @dataclass(frozen=True)
@@ -39,36 +40,40 @@ N_TOTAL = np.prod([len(vs) for vs in SEARCH_SPACE.values()])
 
 def get_dataframe(data_path: str) -> pd.DataFrame:
     data = pickle.load(open(data_path, mode="rb"))
-    obj_vals = {param_name: [] for param_name in OBJ_NAMES.__dict__.values()}
-    for vs in itertools.product(*list(SEARCH_SPACE.values())):
-        index = "".join(
-            [str(choices.index(v)) for choices, v in zip(SEARCH_SPACE.values(), vs)]
-        )
-        query = data[index]
-        obj_vals[OBJ_NAMES.loss].extend(
-            [1.0 - query["bal_acc"][seed][243] for seed in range(N_SEEDS)]
-        )
-        obj_vals[OBJ_NAMES.precision].extend(
-            [query[OBJ_NAMES.precision][seed][243] for seed in range(N_SEEDS)]
-        )
-        obj_vals[OBJ_NAMES.f1].extend(
-            [query[OBJ_NAMES.f1][seed][243] for seed in range(N_SEEDS)]
-        )
-        obj_vals[OBJ_NAMES.runtime].extend(
-            [query[OBJ_NAMES.runtime][seed][243] for seed in range(N_SEEDS)]
-        )
+    obj_vals = {
+        param_name: np.empty(N_TOTAL * N_SEEDS)
+        for param_name in OBJ_NAMES.__dict__.values()
+    }
+    # The keys of data are the concatenated choice indices in the order of itertools.product.
+    indices = itertools.product(
+        *(map(str, range(len(vs))) for vs in SEARCH_SPACE.values())
+    )
+    for i, index in enumerate(indices):
+        query = data["".join(index)]
+        rows = slice(i * N_SEEDS, (i + 1) * N_SEEDS)
+        obj_vals[OBJ_NAMES.loss][rows] = [
+            1.0 - query["bal_acc"][seed][243] for seed in range(N_SEEDS)
+        ]
+        for name in [OBJ_NAMES.precision, OBJ_NAMES.f1, OBJ_NAMES.runtime]:
+            obj_vals[name][rows] = [query[name][seed][243] for seed in range(N_SEEDS)]
 
     return pd.DataFrame(obj_vals)
 
 
 if __name__ == "__main__":
-    target_path = "chpobench/metadata/"
-    os.makedirs(target_path, exist_ok=True)
-    for dataset_name in DATASET_NAMES:
-        data_path = os.path.join(
-            os.environ["HOME"], f"hpo_benchmarks/hpobench/{dataset_name}"
-        )
-        df = get_dataframe(data_path)
-        collector = Collector(obj_names=OBJ_NAMES, n_total=N_TOTAL * N_SEEDS)
-        db = collector.create_database(df)
-        db.to_csv(os.path.join(target_path, f"{dataset_name[:-4]}.csv"), index=False)
+    parser = ArgumentParser()
+    parser.add_argument("--max-workers", type=int, default=None)
+    args = parser.parse_args()
+    build_databases(
+        get_dataframe,
+        data_paths={
+            dataset_name[:-4]: os.path.join(
+                os.environ["HOME"], f"hpo_benchmarks/hpobench/{dataset_name}"
+            )
+            for dataset_name in DATASET_NAMES
+        },
+        target_dir="chpobench/metadata/",
+        obj_names=OBJ_NAMES,
+        n_total=N_TOTAL * N_SEEDS,
+        max_workers=args.max_workers,
+    )
@@ -1,11 +1,17 @@
 import itertools
 import json
 import os
+import shutil
 from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 
+import numpy as np
+
 import pandas as pd
 
+from tqdm import tqdm
+
 from _src._jahs_wrapper import BenchmarkWrapper
 
 
@@ -20,6 +26,13 @@ TARGET_DIR = "_src/jahs_grid_data"
 DATASET_NAMES = ["colorectal_histology", "cifar10", "fashion_mnist"]
 OBJ_NAMES = _ObjectiveNames()
 SEARCH_SPACE = json.load(open("chpobench/discrete_spaces.json"))["jahs-bench-201"]
+# Each shard is one pair of LearningRate and WeightDecay. The rows of the grid follow this order.
+SHARDS = list(
+    itertools.product(
+        [0.001, 0.01, 0.1, 1.0],  # LearningRate
+        [0.00001, 0.0001, 0.001, 0.01],  # WeightDecay
+    )
+)
 FIXED_CONFIGS = {p: [] for p in SEARCH_SPACE}
 for ps in itertools.product(*(vs for vs in SEARCH_SPACE.values())):
     for name, val in zip(SEARCH_SPACE, ps):
@@ -30,35 +43,57 @@ FIXED_CONFIGS["Resolution"] = 1.0
 FIXED_CONFIGS["LearningRate"] = 0.0  # Dummy value for init.
 FIXED_CONFIGS["WeightDecay"] = 0.0  # Dummy value for init.
 
+_bench: BenchmarkWrapper | None = None
 
-def save_results(dataset_name: str) -> None:
-    os.makedirs(TARGET_DIR, exist_ok=True)
-    bench = BenchmarkWrapper(task=dataset_name)
-    config_table = pd.DataFrame(FIXED_CONFIGS)
-    results = []
 
-    for ps in itertools.product(
-        *(
-            [0.001, 0.01, 0.1, 1.0],  # LearningRate
-            [0.00001, 0.0001, 0.001, 0.01],  # WeightDecay
-        )
-    ):
-        print(ps)
-        config_table["LearningRate"] = ps[0]
-        config_table["WeightDecay"] = ps[1]
-        preds = bench(config_table)
-        preds["valid-err"] = 100.0 - preds["valid-acc"]
-        preds = preds.drop(columns=["valid-acc"])
-        results.append(preds)
-
-    df = pd.concat(results, ignore_index=True).astype("float32")
+def _init_worker(dataset_name: str) -> None:
+    # Load the surrogates only once per worker.
+    global _bench
+    _bench = BenchmarkWrapper(task=dataset_name)
+
+
+def save_shard(shard_dir: str, shard: int) -> str:
+    config_table = pd.DataFrame(FIXED_CONFIGS)
+    config_table["LearningRate"], config_table["WeightDecay"] = SHARDS[shard]
+    preds = _bench(config_table)
+    preds["valid-err"] = 100.0 - preds["valid-acc"]
+    df = preds.drop(columns=["valid-acc"]).astype("float32")
     df["valid-err"] = (df["valid-err"] * 100).astype(int) / 100
     df["runtime"] = df["runtime"].astype(int) / 1.0
     df["size_MB"] = (df["size_MB"] * 10**5).astype(int) / 10**5
-    df.to_csv(
-        os.path.join(TARGET_DIR, f"{dataset_name}.csv"),
-        index=False,
-    )
+
+    path = os.path.join(shard_dir, f"{shard:02d}")
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for key in df.columns:
+        np.save(
+            os.path.join(tmp_path, f"{key}.npy"), df[key].to_numpy(dtype=np.float32)
+        )
+
+    # A shard exists only if it is completely written, so interrupted runs can resume.
+    os.replace(tmp_path, path)
+    return path
+
+
+def save_results(dataset_name: str, max_workers: int = 1) -> None:
+    shard_dir = os.path.join(TARGET_DIR, dataset_name)
+    os.makedirs(shard_dir, exist_ok=True)
+    shards = [
+        shard
+        for shard in range(len(SHARDS))
+        if not os.path.isdir(os.path.join(shard_dir, f"{shard:02d}"))
+    ]
+    print(f"Skip {len(SHARDS) - len(shards)} finished shards of {dataset_name}")
+    if len(shards) == 0:
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(dataset_name,)
+    ) as executor:
+        futures = [executor.submit(save_shard, shard_dir, shard) for shard in shards]
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            future.result()
 
 
 if __name__ == "__main__":
@@ -67,6 +102,8 @@ if __name__ == "__main__":
     # After: if False and np.isnan(known_values).any():
     parser = ArgumentParser()
     parser.add_argument("--dataset", choices=DATASET_NAMES, default="cifar10")
+    # Each worker holds its own surrogates, so more workers need more memory.
+    parser.add_argument("--max-workers", type=int, default=1)
     args = parser.parse_args()
     dataset_name = args.dataset
-    save_results(dataset_name)
+    save_results(dataset_name, max_workers=args.max_workers)
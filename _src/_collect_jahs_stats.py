@@ -6,16 +6,18 @@ from dataclasses import dataclass
 import pandas as pd
 
 from _src._collector import Collector, ObjectiveNames
+from chpobench.constraint_info import save_constraint_info_store
+from chpobench.jahs import JAHSBench201
 
 
 @dataclass(frozen=True)
 class JAHSObjectiveNames(ObjectiveNames):
     loss: str = "valid-err"
-    size: str = "size_MB"
+    model_size: str | None = "size_MB"
     runtime: str = "runtime"
 
 
-DATASET_NAMES = ["colorectal_histology.csv", "cifar10.csv", "fashion_mnist.csv"]
+DATASET_NAMES = ["colorectal_histology", "cifar10", "fashion_mnist"]
 OBJ_NAMES = JAHSObjectiveNames()
 
 
@@ -24,8 +26,13 @@ if __name__ == "__main__":
     os.makedirs(target_path, exist_ok=True)
     for dataset_name in DATASET_NAMES:
         print(f"Process {dataset_name}")
-        df = pd.read_csv(f"_src/jahs_grid_data/{dataset_name}")
+        df = pd.DataFrame(
+            JAHSBench201._load_grid(f"_src/jahs_grid_data/{dataset_name}")
+        )
         n_total = len(df)
         collector = Collector(obj_names=OBJ_NAMES, n_total=n_total)
         db = collector.create_database(df)
-        db.to_csv(os.path.join(target_path, dataset_name), index=False)
+        db.to_csv(os.path.join(target_path, f"{dataset_name}.csv"), index=False)
+
+    # Otherwise the stale store shadows the new CSVs.
+    save_constraint_info_store(target_path)
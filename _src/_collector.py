@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable
+
 import numpy as np
 
 import pandas as pd
 
+from tqdm import tqdm
+
+from _src._memory import peak_rss_mb
 from chpobench.constants import _QUANTILES
+from chpobench.constraint_info import save_constraint_info_store
+from chpobench.constraint_stats import compute_grid_stats
 
 
 class ObjectiveNames:
@@ -16,13 +26,19 @@ class ObjectiveNames:
 
 
 class Collector:
-    def __init__(self, obj_names: ObjectiveNames, n_total: int):
+    def __init__(
+        self,
+        obj_names: ObjectiveNames,
+        n_total: int,
+        quantiles: list[float] = _QUANTILES,
+    ):
         self._obj_names = obj_names
         self._n_total = n_total
+        self._quantiles = quantiles[:]
 
     def get_thresholds(self, df: pd.DataFrame) -> dict[str, list[float]]:
         thresholds = {}
-        indices = [int(self._n_total * q) - 1 for q in _QUANTILES]
+        indices = [int(self._n_total * q) - 1 for q in self._quantiles]
 
         for param_name in ["loss", "runtime", "model_size", "precision"]:
             obj_name = getattr(self._obj_names, param_name)
@@ -37,37 +53,6 @@ class Collector:
 
         return thresholds
 
-    @staticmethod
-    def get_mask(df: pd.DataFrame, threshold: dict[str, float]) -> list[bool]:
-        mask = True
-        for k, v in threshold.items():
-            if k != "precision":
-                mask = mask & (df[k] <= v)
-            else:
-                mask = mask & (df[k] >= v)
-
-        return mask
-
-    @classmethod
-    def get_feasible_ratio(cls, df: pd.DataFrame, threshold: dict[str, float]) -> float:
-        mask = cls.get_mask(df, threshold)
-        return np.sum(mask) / len(mask)
-
-    def get_optimal_values(
-        self, df: pd.DataFrame, threshold: dict[str, float]
-    ) -> float:
-        mask = self.get_mask(df, threshold)
-        return df[mask][self._obj_names.loss].min()
-
-    def get_overlap_ratio_with_top_configs(
-        self,
-        df: pd.DataFrame,
-        threshold: dict[str, float],
-        top_val: float,
-    ) -> float:
-        mask = self.get_mask(df, threshold)
-        return np.sum(df[mask][self._obj_names.loss] <= top_val) / len(mask)
-
     def create_database(self, df: pd.DataFrame) -> pd.DataFrame:
         thresholds = self.get_thresholds(df)
         top_vals = np.sort(df[self._obj_names.loss].to_numpy())[
@@ -81,37 +66,86 @@ class Collector:
             "model_size" if self._obj_names.model_size is not None else "precision"
         )
 
+        cstr_names = [getattr(self._obj_names, first_cstr), self._obj_names.runtime]
+        # Negate precision so that smaller values are feasible for every constraint.
+        signs = [-1.0 if first_cstr == "precision" else 1.0, 1.0]
+        stats = compute_grid_stats(
+            loss=df[self._obj_names.loss].to_numpy(dtype=float),
+            constraint_vals=[
+                sign * df[name].to_numpy(dtype=float)
+                for name, sign in zip(cstr_names, signs)
+            ],
+            thresholds=[
+                sign * np.asarray(thresholds[name])
+                for name, sign in zip(cstr_names, signs)
+            ],
+            top_vals=top_vals.tolist(),
+        )
+        # The runtime quantile changes fastest over the rows.
+        q1, q2 = np.meshgrid(self._quantiles, self._quantiles, indexing="ij")
+        t1, t2 = np.meshgrid(*(thresholds[name] for name in cstr_names), indexing="ij")
         data = {
-            f"{first_cstr}_quantile": [],
-            f"{first_cstr}_threshold": [],
-            "runtime_quantile": [],
-            "runtime_threshold": [],
-            "optimal_val": [],
-            "feasible_ratio": [],
-            "top_10%_overlap": [],
-            "top_1%_overlap": [],
+            f"{first_cstr}_quantile": q1.ravel(),
+            f"{first_cstr}_threshold": t1.ravel(),
+            "runtime_quantile": q2.ravel(),
+            "runtime_threshold": t2.ravel(),
+            "optimal_val": stats["optimal_val"].ravel(),
+            "feasible_ratio": stats["feasible_ratio"].ravel(),
+            "top_10%_overlap": stats["top_overlaps"][0].ravel(),
+            "top_1%_overlap": stats["top_overlaps"][1].ravel(),
         }
-        quantiles = _QUANTILES[:]
-        for q1, t1 in zip(quantiles, thresholds[getattr(self._obj_names, first_cstr)]):
-            for q2, t2 in zip(quantiles, thresholds[self._obj_names.runtime]):
-                th = {
-                    getattr(self._obj_names, first_cstr): t1,
-                    self._obj_names.runtime: t2,
-                }
-                if len(th) == 0:
-                    continue
-
-                data[f"{first_cstr}_quantile"].append(q1)
-                data[f"{first_cstr}_threshold"].append(t1)
-                data["runtime_quantile"].append(q2)
-                data["runtime_threshold"].append(t2)
-                data["optimal_val"].append(self.get_optimal_values(df, threshold=th))
-                data["feasible_ratio"].append(self.get_feasible_ratio(df, threshold=th))
-                data["top_10%_overlap"].append(
-                    self.get_overlap_ratio_with_top_configs(df, th, top_vals[0])
-                )
-                data["top_1%_overlap"].append(
-                    self.get_overlap_ratio_with_top_configs(df, th, top_vals[1])
-                )
-
         return pd.DataFrame(data)
+
+
+def save_database(
+    get_dataframe: Callable[[str], pd.DataFrame],
+    data_path: str,
+    target_path: str,
+    obj_names: ObjectiveNames,
+    n_total: int,
+) -> tuple[float, float]:
+    start = time.time()
+    df = get_dataframe(data_path)
+    db = Collector(obj_names=obj_names, n_total=n_total).create_database(df)
+    db.to_csv(target_path, index=False)
+    return time.time() - start, peak_rss_mb()
+
+
+def build_databases(
+    get_dataframe: Callable[[str], pd.DataFrame],
+    data_paths: dict[str, str],
+    target_dir: str,
+    obj_names: ObjectiveNames,
+    n_total: int,
+    max_workers: int | None = None,
+) -> None:
+    # Each worker holds one dataset at a time, so the peak memory of the build is bounded by
+    # max_workers times the largest peak per dataset.
+    os.makedirs(target_dir, exist_ok=True)
+    max_workers = min(len(data_paths), max_workers or os.cpu_count() or 1)
+    peaks = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                save_database,
+                get_dataframe,
+                data_path,
+                os.path.join(target_dir, f"{dataset_name}.csv"),
+                obj_names,
+                n_total,
+            ): dataset_name
+            for dataset_name, data_path in data_paths.items()
+        }
+        with tqdm(total=len(futures)) as pbar:
+            for future in as_completed(futures):
+                elapsed, peak = future.result()
+                peaks.append(peak)
+                pbar.set_postfix_str(f"{futures[future]}: {elapsed:.1f}s, {peak:.0f}MB")
+                pbar.update()
+
+    # Otherwise the stale store shadows the new CSVs.
+    save_constraint_info_store(target_dir)
+    print(
+        f"Peak RSS per worker: {max(peaks):.0f}MB, "
+        f"bound with {max_workers} workers: {max(peaks) * max_workers:.0f}MB"
+    )
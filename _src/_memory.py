@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import os
+import resource
+import sys
+
+
+def peak_rss_mb() -> float:
+    # The peak RSS of this process. ru_maxrss on Linux is inherited through fork and exec, e.g. a
+    # spawned worker reports the peak of its parent, so VmHWM is used instead if available.
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+
+    # ru_maxrss is in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any
+
+import numpy as np
+
+import chpobench
+from _src._benchmark_fixtures import (
+    HPOBENCH_DATASET,
+    HPOBENCH_EPOCHS,
+    HPOLIB_DATASET,
+    HPOLIB_EPOCHS,
+    JAHS_DATASET,
+    make_fixtures,
+)
+from _src._memory import peak_rss_mb
+
+
+# (bench name, dataset name, kwargs of the instantiation, fidelities to sample from)
+CASES: list[tuple[str, str, dict[str, Any], dict[str, list]]] = [
+    *[
+        ("HPOLib", HPOLIB_DATASET, {"backend": b}, {"epochs": HPOLIB_EPOCHS})
+        for b in ["dict", "dense", "mmap"]
+    ],
+    *[
+        ("HPOBench", HPOBENCH_DATASET, {"backend": b}, {"epochs": HPOBENCH_EPOCHS})
+        for b in ["dict", "dense", "mmap"]
+    ],
+    ("JAHSBench201", JAHS_DATASET, {"mode": "tabular"}, {}),
+]
+PERCENTILES = [50, 90, 99]
+
+
+def _sample_configs(bench_cls: Any, n_configs: int, seed: int) -> list[dict[str, Any]]:
+    rng = np.random.RandomState(seed)
+    configs = [
+        {
+            name: choices[rng.randint(len(choices))]
+            for name, choices in bench_cls.discrete_space.items()
+        }
+        for _ in range(n_configs)
+    ]
+    for name, param in bench_cls.config_space.items():
+        if name in bench_cls.discrete_space:
+            continue
+
+        # Continuous parameters, e.g. LearningRate of JAHS-Bench-201, are log-uniform.
+        vals = np.exp(rng.uniform(np.log(param.lower), np.log(param.upper), n_configs))
+        for config, val in zip(configs, vals.tolist()):
+            config[name] = val
+
+    return configs
+
+
+def run_case(
+    bench_name: str,
+    data_path: str,
+    dataset_name: str,
+    kwargs: dict[str, Any],
+    fidel_choices: dict[str, list],
+    n_calls: int,
+    batch_size: int,
+    seed: int = 0,
+) -> dict[str, Any]:
+    # Run in a fresh process so that the load time and the peak RSS belong to this case.
+    rss_before = peak_rss_mb()
+    bench_cls = getattr(chpobench, bench_name)
+    start = time.perf_counter()
+    bench = bench_cls(
+        data_path=data_path,
+        dataset_name=dataset_name,
+        quantiles={"runtime": 0.1},
+        seed=seed,
+        **kwargs,
+    )
+    init_time = time.perf_counter() - start
+
+    rng = np.random.RandomState(seed)
+    configs = _sample_configs(bench_cls, n_calls, seed)
+    fidels = [
+        {
+            name: choices[rng.randint(len(choices))]
+            for name, choices in fidel_choices.items()
+        }
+        for _ in range(n_calls)
+    ]
+    latencies = np.empty(n_calls)
+    for i, (config, fidel) in enumerate(zip(configs, fidels)):
+        start = time.perf_counter()
+        bench(config, fidel)
+        latencies[i] = time.perf_counter() - start
+
+    batch_configs = _sample_configs(bench_cls, batch_size, seed + 1)
+    batch_fidels = {
+        name: np.asarray(choices)[rng.randint(len(choices), size=batch_size)]
+        for name, choices in fidel_choices.items()
+    }
+    start = time.perf_counter()
+    bench.query_batch(batch_configs, batch_fidels)
+    batch_time = time.perf_counter() - start
+
+    return {
+        "bench": bench_name,
+        "dataset_name": dataset_name,
+        "kwargs": kwargs,
+        "init_time_sec": init_time,
+        **{
+            f"latency_p{p}_us": float(np.percentile(latencies, p) * 1e6)
+            for p in PERCENTILES
+        },
+        "latency_max_us": float(latencies.max() * 1e6),
+        "batch_size": batch_size,
+        "batch_throughput_per_sec": batch_size / batch_time,
+        "rss_before_init_mb": rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure_import_time(n_repeats: int) -> dict[str, float]:
+    results = {}
+    for stmt in [
+        "import chpobench",
+        "from chpobench import HPOLib",
+        "from chpobench import HPOBench",
+        "from chpobench import JAHSBench201",
+    ]:
+        times = []
+        for _ in range(n_repeats):
+            code = f"import time; s = time.perf_counter(); {stmt}; print(time.perf_counter() - s)"
+            out = subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, check=True
+            )
+            times.append(float(out.stdout))
+
+        results[stmt] = float(np.median(times))
+
+    return results
+
+
+def compare(results: dict[str, Any], baseline_path: str) -> None:
+    baseline = json.load(open(baseline_path))
+    base_cases = {
+        (c["bench"], json.dumps(c["kwargs"], sort_keys=True)): c
+        for c in baseline["cases"]
+    }
+    for case in results["cases"]:
+        base = base_cases.get(
+            (case["bench"], json.dumps(case["kwargs"], sort_keys=True))
+        )
+        if base is None:
+            continue
+
+        ratios = ", ".join(
+            f"{key}={case[key] / base[key]:.2f}x"
+            for key in [
+                "init_time_sec",
+                "latency_p50_us",
+                "latency_p99_us",
+                "peak_rss_mb",
+            ]
+            if base.get(key)
+        )
+        print(f"{case['bench']} {case['kwargs']}: {ratios}")
+
+
+if __name__ == "__main__":
+    # Run `python -m _src._run_benchmarks` at the root of the repository.
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        default=os.path.join(tempfile.gettempdir(), "chpobench_benchmark"),
+    )
+    parser.add_argument("--output", type=str, default="benchmark_results.json")
+    parser.add_argument("--baseline", type=str, default=None)
+    parser.add_argument("--n-calls", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--n-import-repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    make_fixtures(args.data_dir)
+    cases = []
+    for bench_name, dataset_name, kwargs, fidel_choices in CASES:
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=get_context("spawn")
+        ) as pool:
+            case = pool.submit(
+                run_case,
+                bench_name,
+                args.data_dir,
+                dataset_name,
+                kwargs,
+                fidel_choices,
+                args.n_calls,
+                args.batch_size,
+            ).result()
+
+        print(json.dumps(case))
+        cases.append(case)
+
+    results = {
+        "version": chpobench.__version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "import_time_sec": measure_import_time(args.n_import_repeats),
+        "cases": cases,
+    }
+    with open(args.output, mode="w") as f:
+        json.dump(results, f, indent=4)
+
+    if args.baseline is not None:
+        compare(results, args.baseline)
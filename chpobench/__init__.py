@@ -1,6 +1,13 @@
-from chpobench.hpobench import HPOBench
-from chpobench.hpolib import HPOLib
-from chpobench.jahs import JAHSBench201
+from __future__ import annotations
+
+import importlib
+from typing import Any, TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from chpobench.hpobench import HPOBench
+    from chpobench.hpolib import HPOLib
+    from chpobench.jahs import JAHSBench201
 
 
 __version__ = "0.0.5"
@@ -12,3 +19,23 @@ __url__ = "https://github.com/nabenabe0928/constrained-hpo-bench"
 
 
 __all__ = ["HPOBench", "HPOLib", "JAHSBench201"]
+
+# Benchmark modules are imported on first access so that, e.g., HPOLib does not import jahs_bench.
+_LAZY_ATTRS = {
+    "HPOBench": "chpobench.hpobench",
+    "HPOLib": "chpobench.hpolib",
+    "JAHSBench201": "chpobench.jahs",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    attr = getattr(importlib.import_module(_LAZY_ATTRS[name]), name)
+    globals()[name] = attr
+    return attr
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
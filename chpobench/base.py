@@ -1,16 +1,33 @@
 from __future__ import annotations
 
+import json
 import os
 from abc import ABCMeta, abstractmethod
 from copy import deepcopy
 from dataclasses import dataclass
-from typing import Final, Literal
+from functools import lru_cache
+from typing import Any, Callable, Final, Literal, Mapping, TYPE_CHECKING
 
 import numpy as np
 
-import pandas as pd
-
 from chpobench import constants
+from chpobench.batching import AsyncBatcher
+from chpobench.constraint_info import load_constraint_info
+from chpobench.constraint_stats import ConstraintIndex, ParetoFrontIndex
+from chpobench.instrumentation import Instrumentation
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@lru_cache(maxsize=None)
+def _load_discrete_spaces() -> dict[str, dict[str, list[int | float | str | bool]]]:
+    path = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "discrete_spaces.json"
+    )
+    with open(path) as f:
+        return json.load(f)
 
 
 class BaseDistributionParams(metaclass=ABCMeta):
@@ -18,6 +35,14 @@ class BaseDistributionParams(metaclass=ABCMeta):
     def __contains__(self, value: int | float | str | bool) -> bool:
         raise NotImplementedError
 
+    @abstractmethod
+    def contains_batch(self, values: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    @abstractmethod
+    def compile(self) -> Callable[[Any], bool]:
+        raise NotImplementedError
+
 
 @dataclass(frozen=True)
 class FloatDistributionParams(BaseDistributionParams):
@@ -31,6 +56,16 @@ class FloatDistributionParams(BaseDistributionParams):
         EPS = (self.upper - self.lower) * 1e-5
         return self.lower - EPS <= value <= self.upper + EPS
 
+    def contains_batch(self, values: np.ndarray) -> np.ndarray:
+        EPS = (self.upper - self.lower) * 1e-5
+        values = values.astype(float)
+        return (self.lower - EPS <= values) & (values <= self.upper + EPS)
+
+    def compile(self) -> Callable[[Any], bool]:
+        EPS = (self.upper - self.lower) * 1e-5
+        lower, upper = self.lower - EPS, self.upper + EPS
+        return lambda value: lower <= value <= upper
+
 
 @dataclass(frozen=True)
 class IntDistributionParams(BaseDistributionParams):
@@ -43,6 +78,18 @@ class IntDistributionParams(BaseDistributionParams):
         assert isinstance(value, int)  # mypy redefinition.
         return self.lower <= value <= self.upper
 
+    def contains_batch(self, values: np.ndarray) -> np.ndarray:
+        # Reject the fractional values as __contains__ does instead of truncating them later.
+        return (
+            np.equal(np.mod(values, 1), 0)
+            & (self.lower <= values)
+            & (values <= self.upper)
+        )
+
+    def compile(self) -> Callable[[Any], bool]:
+        lower, upper = self.lower, self.upper
+        return lambda value: lower <= value <= upper and value % 1 == 0
+
 
 @dataclass(frozen=True)
 class OrdinalDistributionParams(BaseDistributionParams):
@@ -52,6 +99,12 @@ class OrdinalDistributionParams(BaseDistributionParams):
     def __contains__(self, value: int | float | str | bool) -> bool:
         return value in self.seq
 
+    def contains_batch(self, values: np.ndarray) -> np.ndarray:
+        return np.isin(values, self.seq)
+
+    def compile(self) -> Callable[[Any], bool]:
+        return frozenset(self.seq).__contains__
+
 
 @dataclass(frozen=True)
 class CategoricalDistributionParams(BaseDistributionParams):
@@ -61,9 +114,49 @@ class CategoricalDistributionParams(BaseDistributionParams):
     def __contains__(self, value: int | float | str | bool) -> bool:
         return value in self.choices
 
+    def contains_batch(self, values: np.ndarray) -> np.ndarray:
+        return np.isin(values, self.choices)
+
+    def compile(self) -> Callable[[Any], bool]:
+        return frozenset(self.choices).__contains__
+
+
+class SpaceValidator:
+    def __init__(self, space: dict[str, BaseDistributionParams]):
+        self._space = space
+        self._checks = {name: param.compile() for name, param in space.items()}
+
+    def validate(self, inputs: dict[str, Any]) -> None:
+        checks = self._checks
+        for name, value in inputs.items():
+            if not checks[name](value):
+                raise ValueError(
+                    f"`{name}` must follow {self._space[name]}, but got {value}."
+                )
+
+    def validate_batch(self, inputs: dict[str, np.ndarray]) -> None:
+        for name, vals in inputs.items():
+            mask = self._space[name].contains_batch(vals)
+            if not np.all(mask):
+                raise ValueError(
+                    f"`{name}` must follow {self._space[name]}, but got {vals[~mask][0]}."
+                )
+
 
 class BaseBench(metaclass=ABCMeta):
     _curdir: Final[str] = os.path.dirname(os.path.abspath(__file__))
+    _validators: tuple[SpaceValidator, SpaceValidator]
+    # The evaluation methods to time and their kinds in Instrumentation.
+    _INSTRUMENTED_EVALS: Final[dict[str, str]] = {
+        "_evaluate": "call",
+        "query_batch": "batch",
+        "query_curve": "curve",
+    }
+    # The internal methods to time and their stages. Each bench adds its own stages.
+    _INSTRUMENTED_STAGES: dict[str, str] = {
+        "_validate_input": "validation",
+        "_validate_batch": "validation",
+    }
 
     def __init__(
         self,
@@ -72,8 +165,13 @@ class BaseBench(metaclass=ABCMeta):
         quantiles: dict[str, float],
         metric_names: list[str] | None = None,
         seed: int | None = None,
+        trust_input: bool = False,
     ):
         self._data_path = data_path
+        self._trust_input = trust_input
+        self._async_batcher: AsyncBatcher | None = None
+        self._instrumentation: Instrumentation | None = None
+        self._pareto_front_index: ParetoFrontIndex | None = None
         self._dataset_name = dataset_name
         self._validate_dataset_name()
         self._quantiles = quantiles
@@ -82,9 +180,9 @@ class BaseBench(metaclass=ABCMeta):
         )
         self._rng = np.random.RandomState(seed)
 
-        if any(q not in constants._QUANTILES for q in quantiles.values()):
+        if any(not 0.0 < q <= 1.0 for q in quantiles.values()):
             raise ValueError(
-                f"`quantiles` for each constraint must be in {constants._QUANTILES}, but got {quantiles}."
+                f"`quantiles` for each constraint must be in (0, 1], but got {quantiles}."
             )
         if not set(self._quantiles).issubset(set(self._metric_names)):
             raise ValueError(
@@ -100,6 +198,31 @@ class BaseBench(metaclass=ABCMeta):
     def reseed(self, seed: int) -> None:
         self._rng = np.random.RandomState(seed)
 
+    @property
+    def instrumentation(self) -> Instrumentation | None:
+        return self._instrumentation
+
+    def enable_instrumentation(
+        self, instrumentation: Instrumentation | None = None
+    ) -> Instrumentation:
+        # Shadow the methods by timed wrappers on this instance, so that the disabled benches keep
+        # the original methods without any checks.
+        self.disable_instrumentation()
+        inst = Instrumentation() if instrumentation is None else instrumentation
+        for name, kind in self._INSTRUMENTED_EVALS.items():
+            setattr(self, name, inst.time_eval(kind, getattr(self, name)))
+        for name, stage in self._INSTRUMENTED_STAGES.items():
+            setattr(self, name, inst.time_stage(stage, getattr(self, name)))
+
+        self._instrumentation = inst
+        return inst
+
+    def disable_instrumentation(self) -> None:
+        for name in [*self._INSTRUMENTED_EVALS, *self._INSTRUMENTED_STAGES]:
+            self.__dict__.pop(name, None)
+
+        self._instrumentation = None
+
     def _validate_dataset_name(self) -> None:
         if self._dataset_name not in self.dataset_names:
             raise ValueError(
@@ -118,56 +241,237 @@ class BaseBench(metaclass=ABCMeta):
             )
 
     def _set_constraints(self) -> None:
-        constraint_info = self.constraint_info
-        mask = True
         quantiles = self._quantiles.copy()
         for cstr_name in self.avail_constraint_names:
             if cstr_name not in quantiles:
                 quantiles[cstr_name] = 1.0
 
-            mask = mask & (
-                constraint_info[f"{cstr_name}_quantile"] == quantiles[cstr_name]
-            )
-
-        if np.sum(mask) != 1:
-            raise ValueError(f"`{quantiles=}` was not correctly specified.")
-        if constraint_info[mask]["feasible_ratio"].iloc[0] == 0.0:
+        target = load_constraint_info(self._dataset_name).lookup(quantiles)
+        if target is None:
+            # The metadata has only the quantiles in constants._QUANTILES.
+            target = self._get_constraint_index().lookup(quantiles)
+        if target["feasible_ratio"] == 0.0:
             raise ValueError(
                 "Constraints are too tight. Please loosen some constraint quantiles."
             )
 
-        target = constraint_info[mask]
-        self._constraints = {
-            key: target[f"{key}_threshold"].iloc[0] for key in self._quantiles
-        }
+        self._constraints = {key: target[f"{key}_threshold"] for key in self._quantiles}
+
+    @abstractmethod
+    def _load_population(self) -> dict[str, np.ndarray]:
+        # The constraint values of the population behind the metadata for arbitrary quantiles.
+        raise NotImplementedError
+
+    def _constraint_index_path(self) -> str:
+        return os.path.join(self._data_path, f"{self._dataset_name}_constraint_index")
+
+    def _get_constraint_index(self) -> ConstraintIndex:
+        path = self._constraint_index_path()
+        if os.path.isdir(path):
+            return ConstraintIndex.load(path)
+
+        return ConstraintIndex.from_population(
+            self._load_population(),
+            constraint_names=self.avail_constraint_names,
+            directions=self.directions,
+        )
+
+    def save_constraint_index(self) -> None:
+        # Sorting the population dominates the cost of arbitrary quantiles, so save it once.
+        ConstraintIndex.from_population(
+            self._load_population(),
+            constraint_names=self.avail_constraint_names,
+            directions=self.directions,
+        ).save(self._constraint_index_path())
+
+    def _pareto_front_index_path(self) -> str:
+        return os.path.join(self._data_path, f"{self._dataset_name}_pareto_front")
+
+    def _get_pareto_front_index(self) -> ParetoFrontIndex:
+        if self._pareto_front_index is None:
+            path = self._pareto_front_index_path()
+            self._pareto_front_index = (
+                ParetoFrontIndex.load(path)
+                if os.path.isdir(path)
+                else ParetoFrontIndex.from_population(
+                    self._load_population(),
+                    constraint_names=self.avail_constraint_names,
+                    directions=self.directions,
+                )
+            )
+
+        return self._pareto_front_index
+
+    def save_pareto_front_index(self) -> None:
+        ParetoFrontIndex.from_population(
+            self._load_population(),
+            constraint_names=self.avail_constraint_names,
+            directions=self.directions,
+        ).save(self._pareto_front_index_path())
+
+    def optimal_loss(
+        self, thresholds: Mapping[str, float | np.ndarray] | None = None
+    ) -> float | np.ndarray:
+        # The best loss among the samples satisfying thresholds (self.constraints by default) in the
+        # same population as optimal_val of the constraint information. The regret of a trial is
+        # its loss minus this value.
+        return self._get_pareto_front_index().optimal_loss(
+            self._constraints if thresholds is None else thresholds
+        )
+
+    @classmethod
+    def _get_validators(cls) -> tuple[SpaceValidator, SpaceValidator]:
+        if "_validators" not in cls.__dict__:
+            cls._validators = (
+                SpaceValidator(cls.config_space),
+                SpaceValidator(cls.fidel_space),
+            )
+
+        return cls._validators
 
     def _validate_input(
         self,
         config: dict[str, int | float | str | bool],
         fidels: dict[str, int | float],
     ) -> None:
-        config_space = self.config_space
-        fidel_space = self.fidel_space
-        for name in config:
-            if config[name] not in config_space[name]:
-                raise ValueError(
-                    f"`{name}` must follow {config_space[name]}, but got {config[name]}."
-                )
-        for name in fidels:
-            if fidels[name] not in fidel_space[name]:
-                raise ValueError(
-                    f"`{name}` must follow {fidel_space[name]}, but got {fidels[name]}."
-                )
+        if self._trust_input:
+            return
+
+        config_validator, fidel_validator = self._get_validators()
+        config_validator.validate(config)
+        fidel_validator.validate(fidels)
+
+    def _validate_batch(
+        self,
+        configs: dict[str, np.ndarray],
+        fidels: dict[str, np.ndarray],
+    ) -> None:
+        if self._trust_input:
+            return
+
+        config_validator, fidel_validator = self._get_validators()
+        config_validator.validate_batch(configs)
+        fidel_validator.validate_batch(fidels)
+
+    def _to_columns(
+        self,
+        configs: list[dict[str, int | float | str | bool]] | dict[str, np.ndarray],
+    ) -> dict[str, np.ndarray]:
+        if isinstance(configs, list):
+            return {
+                name: np.asarray([config[name] for config in configs])
+                for name in (configs[0] if len(configs) > 0 else self.config_space)
+            }
+
+        return {name: np.asarray(configs[name]) for name in configs}
+
+    def query_batch(
+        self,
+        configs: list[dict[str, int | float | str | bool]] | dict[str, np.ndarray],
+        fidels: dict[str, int | float | np.ndarray] | None = None,
+        trial_ids: list[int] | np.ndarray | None = None,
+    ) -> dict[str, np.ndarray]:
+        columns = self._to_columns(configs)
+        n_configs = len(next(iter(columns.values())))
+        batch_fidels = {
+            name: np.broadcast_to(np.asarray(vals), (n_configs,))
+            for name, vals in ({} if fidels is None else fidels).items()
+        }
+        self._validate_batch(columns, batch_fidels)
+        batch_trial_ids = (
+            None if trial_ids is None else np.asarray(trial_ids, dtype=int)
+        )
+        if batch_trial_ids is not None and batch_trial_ids.shape != (n_configs,):
+            raise ValueError(
+                f"trial_ids must have the shape of ({n_configs},), but got {batch_trial_ids.shape}."
+            )
+
+        return self._query_batch(columns, batch_fidels, n_configs, batch_trial_ids)
+
+    def _default_curve_epochs(self) -> np.ndarray:
+        param = self.fidel_space[constants._EPOCHS_KEY]
+        if isinstance(param, OrdinalDistributionParams):
+            return np.asarray(param.seq)
+
+        assert isinstance(param, IntDistributionParams)  # mypy redefinition.
+        return np.arange(param.lower, param.upper + 1)
+
+    def query_curve(
+        self,
+        config: dict[str, int | float | str | bool],
+        epochs: list[int] | np.ndarray | None = None,
+        fidels: dict[str, int | float] | None = None,
+    ) -> dict[str, np.ndarray]:
+        # Return the learning curve of config at every epochs. All the epochs share one seed.
+        fidels = {} if fidels is None else fidels.copy()
+        if constants._EPOCHS_KEY in fidels:
+            raise ValueError(
+                f"Use the `epochs` argument instead of fidels[{constants._EPOCHS_KEY!r}]."
+            )
+
+        curve_epochs = np.asarray(
+            self._default_curve_epochs() if epochs is None else epochs
+        ).ravel()
+        self._validate_input(config, fidels)
+        self._validate_batch({}, {constants._EPOCHS_KEY: curve_epochs})
+        return self._query_curve(config, curve_epochs, fidels)
+
+    def close(self) -> None:
+        # Release the worker thread of aquery. aquery after close starts a new one.
+        if self._async_batcher is not None:
+            self._async_batcher.close()
+            self._async_batcher = None
+
+    async def aquery(
+        self,
+        config: dict[str, int | float | str | bool],
+        fidels: dict[str, int | float] | None = None,
+        trial_id: int | None = None,
+    ) -> dict[str, float]:
+        # Concurrent calls are merged into query_batch. Use AsyncBatcher directly to tune batching.
+        if self._async_batcher is None:
+            self._async_batcher = AsyncBatcher(self)
+
+        return await self._async_batcher.query(config, fidels, trial_id)
 
     @abstractmethod
     def _init_bench(self) -> None:
         raise NotImplementedError
 
     @abstractmethod
+    def _query_batch(
+        self,
+        configs: dict[str, np.ndarray],
+        fidels: dict[str, np.ndarray],
+        n_configs: int,
+        trial_ids: np.ndarray | None = None,
+    ) -> dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _query_curve(
+        self,
+        config: dict[str, int | float | str | bool],
+        epochs: np.ndarray,
+        fidels: dict[str, int | float],
+    ) -> dict[str, np.ndarray]:
+        raise NotImplementedError
+
     def __call__(
+        self,
+        config: dict[str, int | float | str | bool],
+        fidels: dict[str, int | float] | None = None,
+        trial_id: int | None = None,
+    ) -> dict[str, float]:
+        # Python looks up __call__ in the class, so dispatch to a method that can be instrumented.
+        return self._evaluate(config, fidels, trial_id)
+
+    @abstractmethod
+    def _evaluate(
         self,
         config: dict[str, int | float | str | bool],
         fidels: dict[str, int | float] | None,
+        trial_id: int | None = None,
     ) -> dict[str, float]:
         raise NotImplementedError
 
@@ -221,11 +525,40 @@ class BaseBench(metaclass=ABCMeta):
     def constraints(self) -> dict[str, float]:
         return self._constraints.copy()
 
+    def is_feasible(
+        self, results: dict[str, float | np.ndarray]
+    ) -> np.bool_ | np.ndarray:
+        # results is, e.g., the output of query_batch and NaN is infeasible.
+        directions = self.directions
+        feasible = np.ones(np.shape(next(iter(results.values()))), dtype=bool)
+        for name, threshold in self._constraints.items():
+            vals = np.asarray(results[name])
+            feasible &= (
+                vals >= threshold if directions[name] == "max" else vals <= threshold
+            )
+
+        return feasible[()]
+
+    def constraint_violations(
+        self, results: dict[str, float | np.ndarray], normalize: bool = True
+    ) -> dict[str, np.ndarray]:
+        # Positive values violate the constraints and the others satisfy them regardless of
+        # directions. normalize=True divides the violations by the absolute thresholds.
+        directions = self.directions
+        violations = {}
+        for name, threshold in self._constraints.items():
+            diff = np.asarray(results[name], dtype=float) - threshold
+            violation = -diff if directions[name] == "max" else diff
+            if normalize and threshold != 0.0:
+                violation /= abs(threshold)
+
+            violations[name] = violation
+
+        return violations
+
     @property
     def constraint_info(self) -> pd.DataFrame:
-        return pd.read_csv(
-            os.path.join(self._curdir, "metadata", f"{self._dataset_name}.csv")
-        )
+        return load_constraint_info(self._dataset_name).to_frame()
 
     @classmethod
     def avail_quantiles(cls) -> list[float]:
@@ -233,4 +566,4 @@ class BaseBench(metaclass=ABCMeta):
 
     @classmethod
     def get_constraint_info(cls, dataset_name: str) -> pd.DataFrame:
-        return pd.read_csv(os.path.join(cls._curdir, "metadata", f"{dataset_name}.csv"))
+        return load_constraint_info(dataset_name).to_frame()
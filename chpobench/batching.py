@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, TYPE_CHECKING
+
+import numpy as np
+
+
+if TYPE_CHECKING:
+    from chpobench.base import BaseBench
+
+
+def evaluate_calls(
+    bench: BaseBench,
+    calls: list[tuple[dict[str, Any], dict[str, int | float] | None, int | None]],
+) -> list[dict[str, float] | Exception]:
+    # Merge single-config calls of (config, fidels, trial_id) into query_batch. Calls are grouped
+    # by the fidelity names so that omitted fidelities fall back to the defaults of each benchmark,
+    # and by whether they have trial ids as query_batch takes the trial ids of all or none.
+    groups: dict[tuple[tuple[str, ...], bool], list[int]] = {}
+    for i, (_, fidels, trial_id) in enumerate(calls):
+        key = (tuple(sorted(fidels or {})), trial_id is not None)
+        groups.setdefault(key, []).append(i)
+
+    results: list[dict[str, float] | Exception] = [{} for _ in calls]
+    for (fidel_names, has_trial_ids), indices in groups.items():
+        try:
+            batch = bench.query_batch(
+                [calls[i][0] for i in indices],
+                fidels={
+                    name: np.asarray([calls[i][1][name] for i in indices])  # type: ignore[index]
+                    for name in fidel_names
+                },
+                trial_ids=(
+                    np.asarray([calls[i][2] for i in indices])
+                    if has_trial_ids
+                    else None
+                ),
+            )
+        except Exception:
+            # Evaluate one by one so that only the invalid calls get the error.
+            for i in indices:
+                try:
+                    results[i] = bench(*calls[i])
+                except Exception as e:
+                    results[i] = e
+            continue
+
+        for row, i in enumerate(indices):
+            # Keep the arrays of the rows, e.g. all the seeds of seed_aggregation="all".
+            results[i] = {
+                name: float(vals[row]) if np.ndim(vals) == 1 else vals[row]
+                for name, vals in batch.items()
+            }
+
+    return results
+
+
+class AsyncBatcher:
+    def __init__(
+        self,
+        bench: BaseBench,
+        max_batch_size: int = 1024,
+        batch_window: float = 1e-3,
+        executor: Executor | None = None,
+    ):
+        self._bench = bench
+        self._max_batch_size = max_batch_size
+        self._batch_window = batch_window
+        # A single worker keeps the benchmark, e.g. its random state, away from concurrent access.
+        self._executor = (
+            ThreadPoolExecutor(max_workers=1) if executor is None else executor
+        )
+        self._owns_executor = executor is None
+        self._pending: list[
+            tuple[
+                dict[str, Any],
+                dict[str, int | float] | None,
+                int | None,
+                asyncio.Future,
+            ]
+        ] = []
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def __aenter__(self) -> AsyncBatcher:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        if len(self._pending) > 0:
+            self._flush()
+
+        self.close()
+
+    def close(self) -> None:
+        # The submitted batches still finish, but the worker thread exits afterwards. The executor
+        # given by the caller belongs to the caller.
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    async def query(
+        self,
+        config: dict[str, int | float | str | bool],
+        fidels: dict[str, int | float] | None = None,
+        trial_id: int | None = None,
+    ) -> dict[str, float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((config, fidels, trial_id, future))
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._batch_window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending = self._pending, []
+        task = asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            evaluate_calls,
+            self._bench,
+            [(config, fidels, trial_id) for config, fidels, trial_id, _ in pending],
+        )
+        task.add_done_callback(
+            lambda t: self._resolve([future for *_, future in pending], t)
+        )
+
+    @staticmethod
+    def _resolve(futures: list[asyncio.Future], task: asyncio.Future) -> None:
+        exc = task.exception() if not task.cancelled() else asyncio.CancelledError()
+        results = [exc] * len(futures) if exc is not None else task.result()
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            elif isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class PredictionCache:
+    def __init__(self, maxsize: int = 2**16, path: str | None = None):
+        # maxsize bounds the in-memory LRU entries. The optional SQLite file at path keeps every
+        # prediction so that they survive across runs.
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, but got {maxsize}.")
+
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Hashable, dict[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._db: sqlite3.Connection | None = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._db.commit()
+
+    def _insert(self, key: Hashable, value: dict[str, float]) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: Hashable) -> dict[str, float] | None:
+        if self._db is None:
+            return None
+
+        row = self._db.execute(
+            "SELECT value FROM predictions WHERE key = ?", (json.dumps(key),)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def get(self, key: Hashable) -> dict[str, float] | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                value = self._load(key)
+                if value is not None:
+                    self._insert(key, value)
+            else:
+                self._entries.move_to_end(key)
+
+            if value is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            return value.copy()
+
+    def put_many(self, items: list[tuple[Hashable, dict[str, float]]]) -> None:
+        with self._lock:
+            for key, value in items:
+                self._insert(key, value.copy())
+
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?)",
+                    [(json.dumps(key), json.dumps(value)) for key, value in items],
+                )
+                self._db.commit()
+
+    def put(self, key: Hashable, value: dict[str, float]) -> None:
+        self.put_many([(key, value)])
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            n_queries = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / n_queries if n_queries > 0 else 0.0,
+                "size": len(self._entries),
+                "maxsize": self._maxsize,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Final, TYPE_CHECKING
+
+import numpy as np
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+_METADATA_DIR: Final[str] = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "metadata"
+)
+_STORE_NAME: Final[str] = "constraint_info.npz"
+_STORE_PATH: Final[str] = os.path.join(_METADATA_DIR, _STORE_NAME)
+_QUANTILE_SUFFIX: Final[str] = "_quantile"
+
+
+@dataclass(frozen=True)
+class ConstraintInfo:
+    columns: list[str]
+    values: np.ndarray
+    constraint_names: list[str]
+    index: dict[tuple[float, ...], int]
+
+    @classmethod
+    def from_array(cls, columns: list[str], values: np.ndarray) -> ConstraintInfo:
+        quantile_cols = [
+            i for i, col in enumerate(columns) if col.endswith(_QUANTILE_SUFFIX)
+        ]
+        keys = map(tuple, values[:, quantile_cols].tolist())
+        values.setflags(write=False)
+        return cls(
+            columns=columns,
+            values=values,
+            constraint_names=[
+                columns[i][: -len(_QUANTILE_SUFFIX)] for i in quantile_cols
+            ],
+            index={key: row for row, key in enumerate(keys)},
+        )
+
+    def lookup(self, quantiles: dict[str, float]) -> dict[str, float] | None:
+        row = self.index.get(tuple(quantiles[name] for name in self.constraint_names))
+        if row is None:
+            return None
+
+        return dict(zip(self.columns, self.values[row]))
+
+    def to_frame(self) -> pd.DataFrame:
+        import pandas as pd  # pandas is slow to import and is not necessary for queries.
+
+        return pd.DataFrame(self.values.copy(), columns=self.columns)
+
+
+def save_constraint_info_store(metadata_dir: str = _METADATA_DIR) -> None:
+    # The store takes precedence over the CSVs, so rebuild it whenever the CSVs change.
+    import pandas as pd
+
+    arrays = {}
+    for file_name in sorted(os.listdir(metadata_dir)):
+        if not file_name.endswith(".csv"):
+            continue
+
+        df = pd.read_csv(os.path.join(metadata_dir, file_name))
+        dataset_name = file_name[:-4]
+        arrays[dataset_name] = df.to_numpy(dtype=np.float64)
+        arrays[f"{dataset_name}.columns"] = np.asarray(df.columns, dtype=str)
+
+    np.savez(os.path.join(metadata_dir, _STORE_NAME), **arrays)
+
+
+@lru_cache(maxsize=None)
+def _load_store() -> dict[str, np.ndarray] | None:
+    if not os.path.exists(_STORE_PATH):
+        return None
+
+    with np.load(_STORE_PATH, allow_pickle=False) as store:
+        return {key: store[key] for key in store.files}
+
+
+@lru_cache(maxsize=None)
+def load_constraint_info(dataset_name: str) -> ConstraintInfo:
+    store = _load_store()
+    if store is not None and dataset_name in store:
+        return ConstraintInfo.from_array(
+            columns=store[f"{dataset_name}.columns"].tolist(),
+            values=store[dataset_name],
+        )
+
+    import pandas as pd
+
+    df = pd.read_csv(os.path.join(_METADATA_DIR, f"{dataset_name}.csv"))
+    return ConstraintInfo.from_array(
+        columns=df.columns.tolist(), values=df.to_numpy(dtype=np.float64)
+    )
@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import os
+import shutil
+from dataclasses import dataclass
+from typing import Literal, Mapping
+
+import numpy as np
+
+from chpobench import constants
+
+
+def compute_grid_stats(
+    loss: np.ndarray,
+    constraint_vals: list[np.ndarray],
+    thresholds: list[np.ndarray],
+    top_vals: list[float] | None = None,
+) -> dict[str, np.ndarray]:
+    # Compute the statistics for every combination of the thresholds at once. A sample is feasible
+    # if constraint_vals[d] <= thresholds[d][i_d] for all d, so negate constraints to maximize,
+    # e.g. precision, beforehand. Each statistic has the shape of (len(thresholds[0]), ...).
+    # Bin each sample by the smallest threshold that it satisfies. Then, the samples feasible
+    # for a threshold combination are the ones in the bins up to its indices in all dimensions,
+    # so the statistics are the cumulative sum or min of the binned values along each axis.
+    orders = [np.argsort(th, kind="stable") for th in thresholds]
+    shape = tuple(len(th) + 1 for th in thresholds)
+    bins = np.ravel_multi_index(
+        [
+            np.searchsorted(np.asarray(th)[order], vals, side="left")
+            for vals, th, order in zip(constraint_vals, thresholds, orders)
+        ],
+        shape,
+    )
+    n_samples = len(loss)
+    n_bins = int(np.prod(shape))
+    counts = np.bincount(bins, minlength=n_bins).reshape(shape)
+    optimal_vals = np.full(n_bins, np.nan)
+    # fmin ignores NaN, so the bins without any samples remain NaN.
+    np.fmin.at(optimal_vals, bins, loss)
+    optimal_vals = optimal_vals.reshape(shape)
+    overlaps = [
+        np.bincount(bins, weights=loss <= top_val, minlength=n_bins).reshape(shape)
+        for top_val in ([] if top_vals is None else top_vals)
+    ]
+    for axis in range(len(shape)):
+        counts = np.cumsum(counts, axis=axis)
+        optimal_vals = np.fmin.accumulate(optimal_vals, axis=axis)
+        overlaps = [np.cumsum(overlap, axis=axis) for overlap in overlaps]
+
+    # The last bins hold the samples that violate the largest thresholds.
+    feasible = tuple(slice(0, -1) for _ in shape)
+    # Go back to the original order of the thresholds.
+    unsort = np.ix_(*[np.argsort(order) for order in orders])
+    return {
+        "optimal_val": optimal_vals[feasible][unsort],
+        "feasible_ratio": counts[feasible][unsort] / n_samples,
+        "top_overlaps": np.asarray(
+            [overlap[feasible][unsort] / n_samples for overlap in overlaps]
+        ),
+    }
+
+
+@dataclass(frozen=True)
+class ConstraintIndex:
+    # The samples are sorted by the first constraint so that the samples feasible for it form a
+    # prefix. Constraints to maximize are negated so that smaller values are always feasible.
+    constraint_names: list[str]
+    signs: dict[str, float]
+    loss: np.ndarray
+    constraint_vals: dict[str, np.ndarray]
+    sorted_vals: dict[str, np.ndarray]
+    top_vals: np.ndarray
+
+    @classmethod
+    def from_population(
+        cls,
+        population: dict[str, np.ndarray],
+        constraint_names: list[str],
+        directions: dict[str, Literal["min", "max"]],
+    ) -> ConstraintIndex:
+        signs = {
+            name: -1.0 if directions[name] == "max" else 1.0
+            for name in constraint_names
+        }
+        first_name = constraint_names[0]
+        order = np.argsort(
+            signs[first_name] * np.asarray(population[first_name]), kind="stable"
+        )
+        constraint_vals = {
+            name: signs[name] * np.asarray(population[name])[order]
+            for name in constraint_names
+        }
+        loss = np.asarray(population[constants._LOSS_KEY])[order]
+        sorted_loss = np.sort(loss)
+        return cls(
+            constraint_names=constraint_names[:],
+            signs=signs,
+            loss=loss,
+            constraint_vals=constraint_vals,
+            sorted_vals={
+                name: vals if name == first_name else np.sort(vals)
+                for name, vals in constraint_vals.items()
+            },
+            # The same definitions of the top configs as in `_src/_collector.py`.
+            top_vals=sorted_loss[[int(loss.size * 0.1), int(loss.size * 0.01)]],
+        )
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "constraint_names.npy"), self.constraint_names)
+        np.save(
+            os.path.join(tmp_path, "signs.npy"),
+            [self.signs[name] for name in self.constraint_names],
+        )
+        np.save(os.path.join(tmp_path, "loss.npy"), self.loss)
+        np.save(os.path.join(tmp_path, "top_vals.npy"), self.top_vals)
+        for i, name in enumerate(self.constraint_names):
+            np.save(os.path.join(tmp_path, f"{name}.npy"), self.constraint_vals[name])
+            if i > 0:
+                np.save(
+                    os.path.join(tmp_path, f"{name}.sorted.npy"), self.sorted_vals[name]
+                )
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> ConstraintIndex:
+        mmap_mode: Literal["r"] | None = "r" if mmap else None
+        constraint_names = np.load(os.path.join(path, "constraint_names.npy")).tolist()
+        constraint_vals = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in constraint_names
+        }
+        return cls(
+            constraint_names=constraint_names,
+            signs=dict(
+                zip(
+                    constraint_names,
+                    np.load(os.path.join(path, "signs.npy")).tolist(),
+                )
+            ),
+            loss=np.load(os.path.join(path, "loss.npy"), mmap_mode=mmap_mode),
+            constraint_vals=constraint_vals,
+            sorted_vals={
+                name: (
+                    vals
+                    if i == 0
+                    else np.load(
+                        os.path.join(path, f"{name}.sorted.npy"), mmap_mode=mmap_mode
+                    )
+                )
+                for i, (name, vals) in enumerate(constraint_vals.items())
+            },
+            top_vals=np.load(os.path.join(path, "top_vals.npy")),
+        )
+
+    def threshold(self, constraint_name: str, quantile: float) -> float:
+        # The q-quantile is the int(n * q)-th smallest value as in `_src/_collector.py`.
+        sorted_vals = self.sorted_vals[constraint_name]
+        index = max(int(sorted_vals.size * quantile) - 1, 0)
+        return self.signs[constraint_name] * float(sorted_vals[index])
+
+    def lookup(self, quantiles: dict[str, float]) -> dict[str, float]:
+        # Return the statistics in the same format as ConstraintInfo.lookup.
+        thresholds = {
+            name: self.threshold(name, quantiles[name])
+            for name in self.constraint_names
+        }
+        first_name, *other_names = self.constraint_names
+        n_candidates = int(
+            np.searchsorted(
+                self.sorted_vals[first_name],
+                self.signs[first_name] * thresholds[first_name],
+                side="right",
+            )
+        )
+        mask = np.ones(n_candidates, dtype=bool)
+        for name in other_names:
+            mask &= (
+                self.constraint_vals[name][:n_candidates]
+                <= self.signs[name] * thresholds[name]
+            )
+
+        feasible_loss = self.loss[:n_candidates][mask]
+        n_samples = self.loss.size
+        row = {}
+        for name in self.constraint_names:
+            row[f"{name}_quantile"] = quantiles[name]
+            row[f"{name}_threshold"] = thresholds[name]
+
+        row.update(
+            {
+                # fmin ignores NaN and the optimal value is NaN if nothing is feasible.
+                "optimal_val": float(np.fmin.reduce(feasible_loss, initial=np.nan)),
+                "feasible_ratio": feasible_loss.size / n_samples,
+                "top_10%_overlap": np.sum(feasible_loss <= self.top_vals[0])
+                / n_samples,
+                "top_1%_overlap": np.sum(feasible_loss <= self.top_vals[1]) / n_samples,
+            }
+        )
+        return row
+
+
+def _not_dominated(front_vals: list[np.ndarray], vals: list[np.ndarray]) -> np.ndarray:
+    # Whether each point in vals is not dominated by any point in front_vals in two dimensions.
+    if front_vals[0].size == 0:
+        return np.ones(vals[0].size, dtype=bool)
+
+    order = np.argsort(front_vals[0], kind="stable")
+    # The smallest second values among the front points up to each first value.
+    min_second_vals = np.minimum.accumulate(front_vals[1][order])
+    indices = np.searchsorted(front_vals[0][order], vals[0], side="right") - 1
+    dominated = (indices >= 0) & (min_second_vals[np.maximum(indices, 0)] <= vals[1])
+    return ~dominated
+
+
+def _sweep_front(
+    loss: np.ndarray,
+    constraint_vals: list[np.ndarray],
+    indices: np.ndarray,
+    init_chunk_size: int,
+) -> np.ndarray:
+    # Visit the points in the ascending order of loss, so a point is on the front if no point on
+    # the front so far has smaller or equal constraint values. Most points are rejected by a
+    # vectorized check against the front, so only a few points are checked one by one.
+    order = indices[
+        np.lexsort(
+            (constraint_vals[1][indices], constraint_vals[0][indices], loss[indices])
+        )
+    ]
+    front: list[int] = []
+    front_vals = [np.empty(0), np.empty(0)]
+    start, chunk_size = 0, init_chunk_size
+    while start < order.size:
+        chunk = order[start : start + chunk_size]
+        candidates = chunk[
+            _not_dominated(front_vals, [v[chunk] for v in constraint_vals])
+        ]
+        new_vals: list[list[float]] = [[], []]
+        for i in candidates.tolist():
+            first, second = constraint_vals[0][i], constraint_vals[1][i]
+            if any(f <= first and s <= second for f, s in zip(*new_vals)):
+                continue
+
+            front.append(i)
+            new_vals[0].append(first)
+            new_vals[1].append(second)
+
+        front_vals = [np.append(v, new) for v, new in zip(front_vals, new_vals)]
+        start += chunk.size
+        # The front rejects more points as it grows, so the chunks can be larger.
+        chunk_size = min(chunk_size * 2, 2**20)
+
+    return np.asarray(front, dtype=int)
+
+
+def pareto_front(
+    loss: np.ndarray,
+    constraint_vals: list[np.ndarray],
+    init_chunk_size: int = 256,
+    n_best: int = 2**16,
+) -> np.ndarray:
+    # Return the indices of the Pareto front minimizing loss and the two constraint values.
+    if len(constraint_vals) != 2:
+        raise ValueError(
+            f"pareto_front supports two constraints, but got {len(constraint_vals)}."
+        )
+
+    valid = ~np.isnan(loss)
+    for vals in constraint_vals:
+        valid &= ~np.isnan(vals)
+
+    indices = np.flatnonzero(valid)
+    if indices.size > n_best:
+        # Sorting all the points is slow, e.g. 15 s for JAHS-Bench-201. The front of the n_best
+        # best points is not worse in loss than the others, so it drops most of them beforehand.
+        is_best = np.zeros(indices.size, dtype=bool)
+        is_best[np.argpartition(loss[indices], n_best)[:n_best]] = True
+        best_front = _sweep_front(
+            loss, constraint_vals, indices[is_best], init_chunk_size
+        )
+        others = indices[~is_best]
+        others = others[
+            _not_dominated(
+                [v[best_front] for v in constraint_vals],
+                [v[others] for v in constraint_vals],
+            )
+        ]
+        indices = np.concatenate([indices[is_best], others])
+
+    return _sweep_front(loss, constraint_vals, indices, init_chunk_size)
+
+
+@dataclass(frozen=True)
+class ParetoFrontIndex:
+    # optimal_vals[i, j] is the best loss among the samples with the first constraint value
+    # <= coords[0][i] and the second <= coords[1][j]. The best feasible sample is always on the
+    # Pareto front, so the coordinates of the front are sufficient for any thresholds.
+    # Constraints to maximize are negated as in ConstraintIndex.
+    constraint_names: list[str]
+    signs: dict[str, float]
+    coords: list[np.ndarray]
+    optimal_vals: np.ndarray
+
+    @classmethod
+    def from_population(
+        cls,
+        population: dict[str, np.ndarray],
+        constraint_names: list[str],
+        directions: dict[str, Literal["min", "max"]],
+    ) -> ParetoFrontIndex:
+        signs = {
+            name: -1.0 if directions[name] == "max" else 1.0
+            for name in constraint_names
+        }
+        loss = np.asarray(population[constants._LOSS_KEY], dtype=float)
+        constraint_vals = [
+            signs[name] * np.asarray(population[name], dtype=float)
+            for name in constraint_names
+        ]
+        front = pareto_front(loss, constraint_vals)
+        front_vals = [vals[front] for vals in constraint_vals]
+        coords = [np.unique(vals) for vals in front_vals]
+        return cls(
+            constraint_names=constraint_names[:],
+            signs=signs,
+            coords=coords,
+            optimal_vals=compute_grid_stats(loss[front], front_vals, coords)[
+                "optimal_val"
+            ],
+        )
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "constraint_names.npy"), self.constraint_names)
+        np.save(
+            os.path.join(tmp_path, "signs.npy"),
+            [self.signs[name] for name in self.constraint_names],
+        )
+        np.save(os.path.join(tmp_path, "optimal_vals.npy"), self.optimal_vals)
+        for name, coords in zip(self.constraint_names, self.coords):
+            np.save(os.path.join(tmp_path, f"{name}.npy"), coords)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> ParetoFrontIndex:
+        constraint_names = np.load(os.path.join(path, "constraint_names.npy")).tolist()
+        return cls(
+            constraint_names=constraint_names,
+            signs=dict(
+                zip(
+                    constraint_names,
+                    np.load(os.path.join(path, "signs.npy")).tolist(),
+                )
+            ),
+            coords=[
+                np.load(os.path.join(path, f"{name}.npy")) for name in constraint_names
+            ],
+            optimal_vals=np.load(os.path.join(path, "optimal_vals.npy")),
+        )
+
+    def optimal_loss(
+        self, thresholds: Mapping[str, float | np.ndarray]
+    ) -> float | np.ndarray:
+        # The best feasible loss for thresholds, which can be arrays of the same shape. The loss is
+        # NaN if no sample is feasible.
+        indices = []
+        for name, coords in zip(self.constraint_names, self.coords):
+            # Missing constraints are not imposed.
+            signed_threshold = (
+                self.signs[name] * np.asarray(thresholds[name], dtype=float)
+                if name in thresholds
+                else np.inf
+            )
+            indices.append(np.searchsorted(coords, signed_threshold, side="right") - 1)
+
+        broadcast = np.broadcast_arrays(*indices)
+        feasible = np.all([index >= 0 for index in broadcast], axis=0)
+        vals = np.full(feasible.shape, np.nan)
+        vals[feasible] = self.optimal_vals[
+            tuple(index[feasible] for index in broadcast)
+        ]
+        return float(vals) if vals.ndim == 0 else vals
@@ -1,63 +1,53 @@
 from __future__ import annotations
 
-import json
-import os
-import pickle
 from copy import deepcopy
-from typing import Final, Literal
+from typing import Any, Final, Literal
+
+import numpy as np
 
 from chpobench import constants
 from chpobench.base import (
     BaseBench,
     BaseDistributionParams,
     OrdinalDistributionParams,
+    _load_discrete_spaces,
 )
+from chpobench.tabular import TabularBenchMixin
 
 
-class HPOBench(BaseBench):
-    _discrete_space: dict[str, list[int | float | bool | str]] = json.load(
-        open(os.path.join(BaseBench._curdir, "discrete_spaces.json"))
-    )["hpobench"]
+class HPOBench(TabularBenchMixin, BaseBench):
+    _discrete_space: dict[str, list[int | float | bool | str]] = (
+        _load_discrete_spaces()["hpobench"]
+    )
     _EPOCH_CHOICES: Final[list[int]] = [3, 9, 27, 81, 243]
-    _N_SEEDS: Final[int] = 5
-
-    def _init_bench(self) -> None:
-        self._data = pickle.load(
-            open(os.path.join(self._data_path, f"{self._dataset_name}.pkl"), mode="rb")
-        )
-
-    def __call__(
-        self,
-        config: dict[str, int | float | str | bool],
-        fidels: dict[str, int | float] | None = None,
-    ) -> dict[str, float]:
-        fidels = {} if fidels is None else fidels.copy()
-        self._validate_input(config, fidels)
-        epochs = fidels.get(constants._EPOCHS_KEY, self._EPOCH_CHOICES[-1])
-        seed = self._rng.randint(self._N_SEEDS)
-        try:
-            index = "".join(
-                [
-                    str(choices.index(config[key]))
-                    for key, choices in self.discrete_space.items()
-                ]
-            )
-            query = self._data[index]
-        except KeyError:
-            raise KeyError(f"HPOBench does not have the config: {config}")
+    _N_SEEDS: int = 5
+    _MAX_EPOCHS: int = _EPOCH_CHOICES[-1]
+    _RAW_KEYS: dict[str, str] = {
+        constants._LOSS_KEY: "bal_acc",
+        constants._RUNTIME_KEY: "runtime",
+        constants._F1_KEY: "f1",
+        constants._PRECISION_KEY: "precision",
+    }
+    _RAW_LAYOUTS: dict[str, tuple[bool, bool]] = {
+        "bal_acc": (True, True),
+        "runtime": (True, True),
+        "f1": (True, True),
+        "precision": (True, True),
+    }
 
+    def _validate_epochs(self, epochs: int | float) -> None:
         if epochs not in self._EPOCH_CHOICES:
             raise ValueError(
                 f"`epochs` of HPOBench must be in {self._EPOCH_CHOICES}, but got {epochs=}"
             )
 
-        results = {
-            constants._LOSS_KEY: 1.0 - query["bal_acc"][seed][epochs],
-            constants._RUNTIME_KEY: query["runtime"][seed][epochs],
-            constants._F1_KEY: query["f1"][seed][epochs],
-            constants._PRECISION_KEY: query["precision"][seed][epochs],
-        }
-        return {k: v for k, v in results.items() if k in self._metric_names}
+    def _transform(
+        self, metric_name: str, vals: Any, epochs: int | float | np.ndarray
+    ) -> Any:
+        if metric_name == constants._LOSS_KEY:
+            return 1.0 - vals
+
+        return vals
 
     @classmethod
     @property
@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-import json
-import os
-import pickle
 from copy import deepcopy
-from typing import Final, Literal
+from typing import Any, Literal
+
+import numpy as np
 
 from chpobench import constants
 from chpobench.base import (
@@ -13,52 +12,41 @@ from chpobench.base import (
     CategoricalDistributionParams,
     IntDistributionParams,
     OrdinalDistributionParams,
+    _load_discrete_spaces,
 )
-
-
-class HPOLib(BaseBench):
-    _discrete_space: dict[str, list[int | float | bool | str]] = json.load(
-        open(os.path.join(BaseBench._curdir, "discrete_spaces.json"))
-    )["hpolib"]
-    _N_SEEDS: Final[int] = 4
-    _MAX_EPOCHS: Final[int] = 100
-
-    def _init_bench(self) -> None:
-        self._data = pickle.load(
-            open(os.path.join(self._data_path, f"{self._dataset_name}.pkl"), mode="rb")
-        )
-
-    def __call__(
-        self,
-        config: dict[str, int | float | str | bool],
-        fidels: dict[str, int | float] | None = None,
-    ) -> dict[str, float]:
-        fidels = {} if fidels is None else fidels.copy()
-        self._validate_input(config, fidels)
-        epochs = fidels.get(constants._EPOCHS_KEY, self._MAX_EPOCHS)
-        seed = self._rng.randint(self._N_SEEDS)
-        try:
-            index = "".join(
-                [
-                    str(choices.index(config[key]))
-                    for key, choices in self.discrete_space.items()
-                ]
-            )
-            query = self._data[index]
-        except KeyError:
-            raise KeyError(f"HPOLib does not have the config: {config}")
-
-        if epochs > self._MAX_EPOCHS or epochs < 1:
+from chpobench.tabular import TabularBenchMixin
+
+
+class HPOLib(TabularBenchMixin, BaseBench):
+    _discrete_space: dict[str, list[int | float | bool | str]] = (
+        _load_discrete_spaces()["hpolib"]
+    )
+    _N_SEEDS: int = 4
+    _MAX_EPOCHS: int = 100
+    _RAW_KEYS: dict[str, str] = {
+        constants._LOSS_KEY: "valid_mse",
+        constants._MODEL_SIZE_KEY: "n_params",
+        constants._RUNTIME_KEY: "runtime",
+    }
+    _RAW_LAYOUTS: dict[str, tuple[bool, bool]] = {
+        "valid_mse": (True, True),
+        "n_params": (False, False),
+        "runtime": (True, False),
+    }
+
+    def _validate_epochs(self, epochs: int | float) -> None:
+        if epochs > self._MAX_EPOCHS or epochs < 1 or epochs % 1 != 0:
             raise ValueError(
-                f"`epochs` of HPOLib must be in [1, {self._MAX_EPOCHS}], but got {epochs=}"
+                f"`epochs` of HPOLib must be an integer in [1, {self._MAX_EPOCHS}], but got {epochs=}"
             )
 
-        results = dict(
-            loss=query["valid_mse"][seed][epochs],
-            model_size=query["n_params"],
-            runtime=query["runtime"][seed] * epochs / self._MAX_EPOCHS,
-        )
-        return {k: v for k, v in results.items() if k in self._metric_names}
+    def _transform(
+        self, metric_name: str, vals: Any, epochs: int | float | np.ndarray
+    ) -> Any:
+        if metric_name == constants._RUNTIME_KEY:
+            return vals * epochs / self._MAX_EPOCHS
+
+        return vals
 
     @classmethod
     @property
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import inspect
+import json
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Final
+
+import numpy as np
+
+from chpobench import constants
+
+
+# Latency bins from 1 us to 10 s with 8 bins per decade. A list is faster for bisect.
+_LATENCY_EDGES: Final[list[float]] = np.logspace(-6, 1, 57).tolist()
+
+
+class InstrumentationHook:
+    # kind is "call", "batch" or "curve" and inputs maps the argument names to the values,
+    # e.g. {"config": ..., "fidels": ...}.
+    def before_eval(self, kind: str, inputs: dict[str, Any]) -> None:
+        pass
+
+    def after_eval(
+        self, kind: str, inputs: dict[str, Any], results: Any, elapsed: float
+    ) -> None:
+        pass
+
+
+class Instrumentation:
+    def __init__(self, hooks: list[InstrumentationHook] | None = None):
+        self._hooks = [] if hooks is None else hooks[:]
+        self.reset()
+
+    def reset(self) -> None:
+        self._stage_times: dict[str, float] = {}
+        self._stage_counts: dict[str, int] = {}
+        self._eval_counts: dict[str, int] = {}
+        self._n_queries = 0
+        self._latency_counts = [0] * (len(_LATENCY_EDGES) + 1)
+        self._cumulative_runtime = 0.0
+
+    def add_hook(self, hook: InstrumentationHook) -> None:
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: InstrumentationHook) -> None:
+        self._hooks.remove(hook)
+
+    def time_stage(self, stage: str, func: Callable) -> Callable:
+        def _timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._stage_times[stage] = self._stage_times.get(stage, 0.0) + (
+                    time.perf_counter() - start
+                )
+                self._stage_counts[stage] = self._stage_counts.get(stage, 0) + 1
+
+        return _timed
+
+    def time_eval(self, kind: str, func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        def _timed(*args: Any, **kwargs: Any) -> Any:
+            # Bind the arguments only if hooks need them.
+            inputs = signature.bind(*args, **kwargs).arguments if self._hooks else {}
+            for hook in self._hooks:
+                hook.before_eval(kind, inputs)
+
+            start = time.perf_counter()
+            results = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            self._record(kind, results, elapsed)
+            for hook in self._hooks:
+                hook.after_eval(kind, inputs, results, elapsed)
+
+            return results
+
+        return _timed
+
+    def _record(self, kind: str, results: dict[str, Any], elapsed: float) -> None:
+        self._eval_counts[kind] = self._eval_counts.get(kind, 0) + 1
+        self._latency_counts[bisect_left(_LATENCY_EDGES, elapsed)] += 1
+        runtime = results.get(constants._RUNTIME_KEY)
+        if runtime is not None and np.ndim(runtime) == (1 if kind == "call" else 2):
+            # seed_aggregation="all" adds the seed axis, but a query trains only one seed.
+            runtime = np.mean(runtime, axis=-1)
+        if kind == "call":
+            self._n_queries += 1
+            self._cumulative_runtime += (
+                0.0 if runtime is None else float(np.sum(runtime))
+            )
+            return
+
+        # Each row of the results is one query.
+        vals = next(iter(results.values()), None)
+        self._n_queries += 0 if vals is None else len(vals)
+        if runtime is None or np.size(runtime) == 0:
+            return
+
+        # The runtime is cumulative over the epochs, so a curve costs only its longest epoch.
+        self._cumulative_runtime += float(
+            np.sum(np.max(runtime, axis=0) if kind == "curve" else runtime)
+        )
+
+    def _latency_percentile(self, q: float) -> float | None:
+        # The upper edge of the bin that includes the q-th percentile.
+        n_evals = sum(self._latency_counts)
+        if n_evals == 0:
+            return None
+
+        index = int(np.searchsorted(np.cumsum(self._latency_counts), n_evals * q / 100))
+        return _LATENCY_EDGES[min(index, len(_LATENCY_EDGES) - 1)]
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "eval_counts": self._eval_counts.copy(),
+            # The number of evaluated pairs of config and fidelities.
+            "n_queries": self._n_queries,
+            "cumulative_runtime": self._cumulative_runtime,
+            "stages": {
+                stage: {
+                    "total_sec": total,
+                    "count": self._stage_counts[stage],
+                    "mean_us": total / self._stage_counts[stage] * 1e6,
+                }
+                for stage, total in self._stage_times.items()
+            },
+            "latency": {
+                **{
+                    f"p{q}_upper_sec": self._latency_percentile(q) for q in [50, 90, 99]
+                },
+                "bin_edges_sec": _LATENCY_EDGES[:],
+                # counts[i] is the number of evaluations in [edges[i - 1], edges[i]).
+                "counts": self._latency_counts[:],
+            },
+        }
+
+    def to_json(self, path: str | None = None) -> str:
+        dumped = json.dumps(self.stats)
+        if path is not None:
+            with open(path, mode="w") as f:
+                f.write(dumped)
+
+        return dumped
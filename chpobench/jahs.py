@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-import json
+import bisect
+import math
 import os
 from copy import deepcopy
 from typing import Final, Literal
 
-from jahs_bench import Benchmark
+import numpy as np
 
 from chpobench import constants
 from chpobench.base import (
@@ -15,22 +16,188 @@ from chpobench.base import (
     FloatDistributionParams,
     IntDistributionParams,
     OrdinalDistributionParams,
+    _load_discrete_spaces,
 )
+from chpobench.cache import PredictionCache
+from chpobench.tabular import ConfigEncoder, DenseTable
 
 
 _RESOL_KEY: Final[str] = "Resolution"
 _JAHS_LOSS_KEY: Final[str] = "valid-acc"
 _JAHS_RUNTIME_KEY: Final[str] = "runtime"
 _JAHS_MODEL_SIZE_KEY: Final[str] = "size_MB"
+# The grid evaluated by `_src/_collect_jahs.py` stores the error instead of the accuracy.
+_JAHS_ERR_KEY: Final[str] = "valid-err"
+_LR_GRID: Final[list[float]] = [0.001, 0.01, 0.1, 1.0]
+_WD_GRID: Final[list[float]] = [0.00001, 0.0001, 0.001, 0.01]
+_MODES: Final[tuple[str, ...]] = ("surrogate", "tabular")
+# The decimals that `_src/_collect_jahs.py` rounds each metric of the grid to.
+_GRID_DECIMALS: Final[dict[str, int]] = {
+    _JAHS_ERR_KEY: 2,
+    _JAHS_RUNTIME_KEY: 0,
+    _JAHS_MODEL_SIZE_KEY: 5,
+}
+
+
+def _log_mids(grid: list[float]) -> list[float]:
+    return [(math.log(lo) + math.log(hi)) / 2 for lo, hi in zip(grid[:-1], grid[1:])]
+
+
+def _snap_to_grid(val: float, grid: list[float]) -> float:
+    # Snap to the nearest grid point in the log scale.
+    return grid[bisect.bisect_left(_log_mids(grid), math.log(val))]
+
+
+def _snap_batch_to_grid(vals: np.ndarray, grid: list[float]) -> np.ndarray:
+    return np.asarray(grid)[np.searchsorted(_log_mids(grid), np.log(vals))]
 
 
 class JAHSBench201(BaseBench):
-    _discrete_space: dict[str, list[int | float | bool | str]] = json.load(
-        open(os.path.join(BaseBench._curdir, "discrete_spaces.json"))
-    )["jahs-bench-201"]
+    _discrete_space: dict[str, list[int | float | bool | str]] = (
+        _load_discrete_spaces()["jahs-bench-201"]
+    )
     _MAX_EPOCHS: Final[int] = 200
+    _GRID_METRIC_KEYS: Final[dict[str, str]] = {
+        constants._LOSS_KEY: _JAHS_ERR_KEY,
+        constants._RUNTIME_KEY: _JAHS_RUNTIME_KEY,
+        constants._MODEL_SIZE_KEY: _JAHS_MODEL_SIZE_KEY,
+    }
+    _CONFIG_NAMES: Final[list[str]] = ["LearningRate", "WeightDecay", *_discrete_space]
+    # The types of the values in the space, so that e.g. 1 and True share a key of the cache.
+    _KEY_TYPES: Final[list[type]] = [
+        float,
+        float,
+        *(type(choices[0]) for choices in _discrete_space.values()),
+    ]
+    _grid_encoder: ConfigEncoder
+    _INSTRUMENTED_STAGES: dict[str, str] = {
+        "_validate_input": "validation",
+        "_validate_batch": "validation",
+        "_lookup_grid": "lookup",
+        "_run_surrogate": "surrogate",
+        "_run_surrogates": "surrogate",
+    }
+
+    def __init__(
+        self,
+        data_path: str,
+        dataset_name: str,
+        quantiles: dict[str, float],
+        metric_names: list[str] | None = None,
+        seed: int | None = None,
+        trust_input: bool = False,
+        mode: Literal["surrogate", "tabular"] = "surrogate",
+        cache: PredictionCache | None = None,
+    ):
+        if mode not in _MODES:
+            raise ValueError(f"mode must be in {_MODES}, but got {mode}.")
+
+        self._mode = mode
+        self._cache = cache
+        super().__init__(
+            data_path=data_path,
+            dataset_name=dataset_name,
+            quantiles=quantiles,
+            metric_names=metric_names,
+            seed=seed,
+            trust_input=trust_input,
+        )
+
+    @classmethod
+    def _get_grid_encoder(cls) -> ConfigEncoder:
+        # The row order of the grid follows this space.
+        if "_grid_encoder" not in cls.__dict__:
+            cls._grid_encoder = ConfigEncoder(
+                {
+                    "LearningRate": _LR_GRID,
+                    "WeightDecay": _WD_GRID,
+                    **cls._discrete_space,
+                }
+            )
+
+        return cls._grid_encoder
+
+    @classmethod
+    def _grid_store_path(cls, data_path: str, dataset_name: str) -> str:
+        return os.path.join(data_path, f"{dataset_name}_grid")
+
+    @classmethod
+    def _load_grid(cls, grid_path: str) -> dict[str, np.ndarray]:
+        keys = list(cls._GRID_METRIC_KEYS.values())
+        if not os.path.isdir(grid_path):
+            import pandas as pd
+
+            df = pd.read_csv(grid_path)
+            grid = {key: df[key].to_numpy() for key in keys}
+        else:
+            # Shards by `_src/_collect_jahs.py` are named by their order and hold .npy columns.
+            shards = sorted(
+                name
+                for name in os.listdir(grid_path)
+                if os.path.isdir(os.path.join(grid_path, name)) and name.isdigit()
+            )
+            # Each shard is one pair of LearningRate and WeightDecay.
+            n_shards = len(_LR_GRID) * len(_WD_GRID)
+            if len(shards) != n_shards:
+                raise ValueError(
+                    f"{grid_path} must have {n_shards} shards, but got {len(shards)}. Please "
+                    "finish the collection by `_src/_collect_jahs.py` first."
+                )
+
+            grid = {
+                key: np.concatenate(
+                    [
+                        np.load(os.path.join(grid_path, shard, f"{key}.npy"))
+                        for shard in shards
+                    ]
+                )
+                for key in keys
+            }
+
+        # The shards are float32, so restore the rounded values in float64. Otherwise, e.g.
+        # size_MB=0.0049 becomes larger than the same threshold in the metadata.
+        return {
+            key: np.round(vals.astype(np.float64), _GRID_DECIMALS[key])
+            for key, vals in grid.items()
+        }
+
+    @classmethod
+    def create_grid_store(
+        cls,
+        data_path: str,
+        dataset_name: str,
+        grid_path: str,
+    ) -> None:
+        # grid_path is either the shard directory or a CSV file of the grid.
+        grid = cls._load_grid(grid_path)
+        n_configs = cls._get_grid_encoder().n_configs
+        n_rows = len(grid[_JAHS_ERR_KEY])
+        if n_rows != n_configs:
+            raise ValueError(
+                f"The grid must have {n_configs} rows, but {grid_path} has {n_rows} rows."
+            )
+
+        table = DenseTable(
+            metrics={key: vals.reshape(-1, 1, 1) for key, vals in grid.items()},
+            epochs=np.asarray([cls._MAX_EPOCHS]),
+            exists=np.ones(n_configs, dtype=bool),
+        )
+        table.save(cls._grid_store_path(data_path, dataset_name))
+        bench = cls(data_path, dataset_name, quantiles={}, mode="tabular")
+        bench.save_constraint_index()
+        bench.save_pareto_front_index()
 
     def _init_bench(self) -> None:
+        if self._mode == "tabular":
+            self._table = DenseTable.load(
+                self._grid_store_path(self._data_path, self._dataset_name),
+                keys=[self._GRID_METRIC_KEYS[name] for name in self._metric_names],
+            )
+            return
+
+        # jahs_bench is heavy, so we import it only if necessary.
+        from jahs_bench import Benchmark
+
         metric_dict = {
             constants._LOSS_KEY: _JAHS_LOSS_KEY,
             constants._RUNTIME_KEY: _JAHS_RUNTIME_KEY,
@@ -43,28 +210,259 @@ class JAHSBench201(BaseBench):
             download=False,
         )
 
-    def __call__(
+    def _load_population(self) -> dict[str, np.ndarray]:
+        path = self._grid_store_path(self._data_path, self._dataset_name)
+        if not os.path.isdir(path):
+            raise FileNotFoundError(
+                f"Arbitrary quantiles of JAHSBench201 are computed on the grid at {path}. "
+                "Please create it by `create_grid_store` first."
+            )
+
+        names = [constants._LOSS_KEY, *self.avail_constraint_names]
+        table = DenseTable.load(
+            path, keys=[self._GRID_METRIC_KEYS[name] for name in names]
+        )
+        return {
+            name: np.asarray(
+                table.metrics[self._GRID_METRIC_KEYS[name]][:, 0, 0], dtype=float
+            )
+            for name in names
+        }
+
+    def _validate_grid_fidels(
+        self, epochs: int | float | np.ndarray, resols: float | np.ndarray
+    ) -> None:
+        if np.any(epochs != self._MAX_EPOCHS) or np.any(resols != 1.0):
+            raise ValueError(
+                f"The tabular mode of JAHSBench201 supports only epochs={self._MAX_EPOCHS} and "
+                f"{_RESOL_KEY}=1.0, but got {epochs=} and {resols=}"
+            )
+
+    def _lookup_grid(
+        self, config_ids: int | np.ndarray
+    ) -> dict[str, float | np.ndarray]:
+        return {
+            name: self._table.take(self._GRID_METRIC_KEYS[name], config_ids, 0, 0)
+            for name in self._metric_names
+        }
+
+    def _predict(
         self,
         config: dict[str, int | float | str | bool],
-        fidels: dict[str, int | float] | None = None,
+        epochs: int | float,
+        resol: float,
     ) -> dict[str, float]:
-        fidels = {} if fidels is None else fidels.copy()
-        self._validate_input(config, fidels)
-        epochs = fidels.get(constants._EPOCHS_KEY, self._MAX_EPOCHS)
-        resol = fidels.get(_RESOL_KEY, 1.0)
+        if self._mode == "tabular":
+            self._validate_grid_fidels(epochs, resol)
+            config_id = self._get_grid_encoder().encode_id(
+                {
+                    **config,
+                    "LearningRate": _snap_to_grid(
+                        float(config["LearningRate"]), _LR_GRID
+                    ),
+                    "WeightDecay": _snap_to_grid(
+                        float(config["WeightDecay"]), _WD_GRID
+                    ),
+                }
+            )
+            return {k: float(v) for k, v in self._lookup_grid(config_id).items()}
+
+        key = None
+        if self._cache is not None:
+            key = self._cache_key(
+                tuple(config[name] for name in self._CONFIG_NAMES), epochs, resol
+            )
+            if (cached := self._cache.get(key)) is not None:
+                return cached
+
         config["Optimizer"] = "SGD"
         config[_RESOL_KEY] = resol
 
-        preds = self._surrogate(config, nepochs=epochs)[epochs]
+        preds = self._run_surrogate(config, epochs)
         metric_dict = {
             _JAHS_LOSS_KEY: constants._LOSS_KEY,
             _JAHS_RUNTIME_KEY: constants._RUNTIME_KEY,
             _JAHS_MODEL_SIZE_KEY: constants._MODEL_SIZE_KEY,
         }
-        return {
+        results = {
             metric_dict[k]: 100.0 - v if k == _JAHS_LOSS_KEY else v
             for k, v in preds.items()
         }
+        if self._cache is not None:
+            self._cache.put(key, {k: float(v) for k, v in results.items()})
+
+        return results
+
+    def _cache_key(
+        self, config_vals: tuple, epochs: int | float, resol: float
+    ) -> tuple:
+        # The SQLite cache serializes the keys to JSON, where True and 1 or 1 and 1.0 differ.
+        canonical_vals = tuple(
+            key_type(v) for key_type, v in zip(self._KEY_TYPES, config_vals)
+        )
+        metric_names = tuple(self._metric_names)
+        return (
+            self._dataset_name,
+            metric_names,
+            canonical_vals,
+            int(epochs),
+            float(resol),
+        )
+
+    def _predict_batch(
+        self, configs: dict[str, np.ndarray], epochs: np.ndarray, resols: np.ndarray
+    ) -> dict[str, np.ndarray]:
+        if self._cache is None:
+            return self._run_surrogates(configs, epochs=epochs, resols=resols)
+
+        keys = [
+            self._cache_key(config_vals, e, r)
+            for config_vals, e, r in zip(
+                zip(*(configs[name].tolist() for name in self._CONFIG_NAMES)),
+                np.asarray(epochs).tolist(),
+                np.asarray(resols).tolist(),
+            )
+        ]
+        results = {name: np.empty(len(keys)) for name in self._metric_names}
+        misses = []
+        for i, key in enumerate(keys):
+            cached = self._cache.get(key)
+            if cached is None:
+                misses.append(i)
+                continue
+
+            for name, v in cached.items():
+                results[name][i] = v
+
+        if len(misses) > 0:
+            # Predict each missed key once and copy the predictions to its duplicates.
+            positions: dict[tuple, int] = {}
+            inverse = np.asarray(
+                [positions.setdefault(keys[i], len(positions)) for i in misses]
+            )
+            rows = np.asarray(misses)[np.unique(inverse, return_index=True)[1]]
+            preds = self._run_surrogates(
+                {name: vals[rows] for name, vals in configs.items()},
+                epochs=np.asarray(epochs)[rows],
+                resols=np.asarray(resols)[rows],
+            )
+            for name, vals in preds.items():
+                results[name][misses] = vals[inverse]
+
+            self._cache.put_many(
+                [
+                    (keys[i], {name: float(vals[j]) for name, vals in preds.items()})
+                    for j, i in enumerate(rows.tolist())
+                ]
+            )
+
+        return results
+
+    def _run_surrogate(
+        self, config: dict[str, int | float | str | bool], epochs: int | float
+    ) -> dict[str, float]:
+        return self._surrogate(config, nepochs=epochs)[epochs]
+
+    def _run_surrogates(
+        self, configs: dict[str, np.ndarray], epochs: np.ndarray, resols: np.ndarray
+    ) -> dict[str, np.ndarray]:
+        import pandas as pd
+
+        features = pd.DataFrame({name: configs[name] for name in self.config_space})
+        features["Optimizer"] = "SGD"
+        features[_RESOL_KEY] = resols
+        features["epoch"] = epochs
+        # NOTE: Benchmark.__call__ accepts only one config, so we directly use its surrogates.
+        preds = pd.concat(
+            [model.predict(features) for model in self._surrogate._surrogates.values()],
+            axis=1,
+        )
+        metric_dict = {
+            _JAHS_LOSS_KEY: constants._LOSS_KEY,
+            _JAHS_RUNTIME_KEY: constants._RUNTIME_KEY,
+            _JAHS_MODEL_SIZE_KEY: constants._MODEL_SIZE_KEY,
+        }
+        results = {k: preds[k].to_numpy(dtype=float) for k in preds.columns}
+        return {
+            metric_dict[k]: 100.0 - v if k == _JAHS_LOSS_KEY else v
+            for k, v in results.items()
+        }
+
+    def _query_batch(
+        self,
+        configs: dict[str, np.ndarray],
+        fidels: dict[str, np.ndarray],
+        n_configs: int,
+        trial_ids: np.ndarray | None = None,
+    ) -> dict[str, np.ndarray]:
+        # The surrogates and the grid are deterministic, so trial_ids does not change the results.
+        if n_configs == 0:
+            return {name: np.empty(0) for name in self._metric_names}
+        if self._mode == "tabular":
+            self._validate_grid_fidels(
+                fidels.get(constants._EPOCHS_KEY, self._MAX_EPOCHS),
+                fidels.get(_RESOL_KEY, 1.0),
+            )
+            encoder = self._get_grid_encoder()
+            codes = encoder.encode_batch(
+                {
+                    **configs,
+                    "LearningRate": _snap_batch_to_grid(
+                        configs["LearningRate"], _LR_GRID
+                    ),
+                    "WeightDecay": _snap_batch_to_grid(
+                        configs["WeightDecay"], _WD_GRID
+                    ),
+                }
+            )
+            results = self._lookup_grid(encoder.to_ids(codes))
+            return {k: np.asarray(v, dtype=float) for k, v in results.items()}
+
+        return self._predict_batch(
+            configs,
+            epochs=fidels.get(
+                constants._EPOCHS_KEY, np.full(n_configs, self._MAX_EPOCHS)
+            ),
+            resols=fidels.get(_RESOL_KEY, np.full(n_configs, 1.0)),
+        )
+
+    def _default_curve_epochs(self) -> np.ndarray:
+        if self._mode == "tabular":
+            return self._table.epochs.copy()
+
+        return super()._default_curve_epochs()
+
+    def _query_curve(
+        self,
+        config: dict[str, int | float | str | bool],
+        epochs: np.ndarray,
+        fidels: dict[str, int | float],
+    ) -> dict[str, np.ndarray]:
+        # The surrogates take epoch as a feature, so the whole curve is one batch.
+        n_epochs = epochs.size
+        configs = {
+            name: np.asarray([config[name]] * n_epochs) for name in self._CONFIG_NAMES
+        }
+        return self._query_batch(
+            configs,
+            {
+                constants._EPOCHS_KEY: epochs,
+                _RESOL_KEY: np.full(n_epochs, fidels.get(_RESOL_KEY, 1.0)),
+            },
+            n_epochs,
+        )
+
+    def _evaluate(
+        self,
+        config: dict[str, int | float | str | bool],
+        fidels: dict[str, int | float] | None = None,
+        trial_id: int | None = None,
+    ) -> dict[str, float]:
+        fidels = {} if fidels is None else fidels.copy()
+        self._validate_input(config, fidels)
+        epochs = fidels.get(constants._EPOCHS_KEY, self._MAX_EPOCHS)
+        resol = fidels.get(_RESOL_KEY, 1.0)
+        return self._predict(config, epochs=epochs, resol=resol)
 
     @classmethod
     @property
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from argparse import ArgumentParser
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.reduction import ForkingPickler
+from typing import Any, Literal
+
+import numpy as np
+
+import chpobench
+from chpobench.base import BaseBench
+from chpobench.batching import evaluate_calls
+
+
+_CALL: str = "__call__"
+_QUERY_BATCH: str = "query_batch"
+_GETATTR: str = "getattr"
+_PUBLIC_ATTRS: tuple[str, ...] = (
+    "constraints",
+    "dataset_name",
+    "avail_obj_names",
+    "avail_constraint_names",
+    "directions",
+)
+
+
+class BenchServer:
+    def __init__(
+        self,
+        benches: dict[str, BaseBench],
+        address: str | tuple[str, int],
+        authkey: bytes,
+        max_batch_size: int = 1024,
+        batch_window: float = 1e-3,
+    ):
+        # NOTE: Messages are pickled, so never expose the server outside trusted hosts.
+        self._benches = benches
+        self._listener = Listener(address, authkey=authkey)
+        self._max_batch_size = max_batch_size
+        self._batch_window = batch_window
+        self._requests: queue.Queue[tuple[Connection, str, str, tuple] | None] = (
+            queue.Queue()
+        )
+        self._closed = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def address(self) -> str | tuple[str, int]:
+        return self._listener.address
+
+    def _accept(self) -> None:
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                if self._closed.is_set():
+                    return
+                continue
+
+            thread = threading.Thread(target=self._receive, args=(conn,), daemon=True)
+            thread.start()
+
+    def _receive(self, conn: Connection) -> None:
+        with conn:
+            while not self._closed.is_set():
+                try:
+                    bench_name, method, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                self._requests.put((conn, bench_name, method, args))
+
+    def _collect(self) -> list[tuple[Connection, str, str, tuple]]:
+        request = self._requests.get()
+        if request is None:
+            return []
+
+        requests = [request]
+        deadline = time.monotonic() + self._batch_window
+        while len(requests) < self._max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                request = self._requests.get(timeout=max(timeout, 0.0))
+            except queue.Empty:
+                break
+
+            if request is None:
+                self._requests.put(None)
+                break
+
+            requests.append(request)
+
+        return requests
+
+    def _handle(self, requests: list[tuple[Connection, str, str, tuple]]) -> None:
+        calls: dict[str, list[tuple[Connection, tuple]]] = {}
+        for conn, bench_name, method, args in requests:
+            if method == _CALL and bench_name in self._benches:
+                calls.setdefault(bench_name, []).append((conn, args))
+                continue
+
+            response: Any
+            try:
+                bench = self._benches[bench_name]
+                if method == _QUERY_BATCH:
+                    response = bench.query_batch(*args)
+                elif method == _GETATTR and args[0] in _PUBLIC_ATTRS:
+                    response = getattr(bench, args[0])
+                else:
+                    raise ValueError(f"Unknown request: {method}{args}")
+            except Exception as e:
+                response = e
+
+            self._send(conn, response)
+
+        for bench_name, bench_calls in calls.items():
+            results: list[Any]
+            try:
+                results = evaluate_calls(
+                    self._benches[bench_name], [args for _, args in bench_calls]
+                )
+            except Exception as e:
+                # An error must not kill the serving thread, or every client waits forever.
+                results = [e] * len(bench_calls)
+
+            for (conn, _), result in zip(bench_calls, results):
+                self._send(conn, result)
+
+    @staticmethod
+    def _send(conn: Connection, response: Any) -> None:
+        # Pickle before writing anything, so that an unpicklable response becomes an error.
+        try:
+            payload = ForkingPickler.dumps(response)
+        except Exception as e:
+            payload = ForkingPickler.dumps(
+                RuntimeError(f"Failed to pickle the response: {e!r}")
+            )
+
+        try:
+            conn.send_bytes(payload)
+        except (EOFError, OSError):
+            pass
+
+    def serve_forever(self) -> None:
+        accept_thread = threading.Thread(target=self._accept, daemon=True)
+        accept_thread.start()
+        self._threads.append(accept_thread)
+        while True:
+            requests = self._collect()
+            if len(requests) == 0:
+                return
+
+            self._handle(requests)
+
+    def start(self) -> None:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def close(self) -> None:
+        self._closed.set()
+        self._requests.put(None)
+        self._listener.close()
+
+
+class BenchClient:
+    def __init__(
+        self,
+        address: str | tuple[str, int],
+        authkey: bytes,
+        bench_name: str,
+        pool_size: int = 8,
+        timeout: float | None = 60.0,
+    ):
+        # timeout is the seconds to wait for each response and None waits forever.
+        self._address = address
+        self._authkey = authkey
+        self._bench_name = bench_name
+        self._pool: queue.LifoQueue[Connection] = queue.LifoQueue()
+        self._semaphore = threading.BoundedSemaphore(pool_size)
+        self._timeout = timeout
+
+    def _request(self, method: str, *args: Any) -> Any:
+        with self._semaphore:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                conn = Client(self._address, authkey=self._authkey)
+
+            try:
+                conn.send((self._bench_name, method, args))
+                if self._timeout is not None and not conn.poll(self._timeout):
+                    raise TimeoutError(
+                        f"No response from the server in {self._timeout} seconds."
+                    )
+
+                response = conn.recv()
+            except BaseException:
+                conn.close()
+                raise
+
+            self._pool.put(conn)
+
+        if isinstance(response, Exception):
+            raise response
+
+        return response
+
+    def __call__(
+        self,
+        config: dict[str, int | float | str | bool],
+        fidels: dict[str, int | float] | None = None,
+        trial_id: int | None = None,
+    ) -> dict[str, float]:
+        return self._request(_CALL, config, fidels, trial_id)
+
+    def query_batch(
+        self,
+        configs: list[dict[str, int | float | str | bool]] | dict[str, np.ndarray],
+        fidels: dict[str, int | float | np.ndarray] | None = None,
+        trial_ids: list[int] | np.ndarray | None = None,
+    ) -> dict[str, np.ndarray]:
+        return self._request(_QUERY_BATCH, configs, fidels, trial_ids)
+
+    @property
+    def constraints(self) -> dict[str, float]:
+        return self._request(_GETATTR, "constraints")
+
+    @property
+    def dataset_name(self) -> str:
+        return self._request(_GETATTR, "dataset_name")
+
+    @property
+    def avail_obj_names(self) -> list[str]:
+        return self._request(_GETATTR, "avail_obj_names")
+
+    @property
+    def avail_constraint_names(self) -> list[str]:
+        return self._request(_GETATTR, "avail_constraint_names")
+
+    @property
+    def directions(self) -> dict[str, Literal["min", "max"]]:
+        return self._request(_GETATTR, "directions")
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+def _parse_address(address: str) -> str | tuple[str, int]:
+    # host:port is TCP and anything else is the path to a Unix socket.
+    host, _, port = address.rpartition(":")
+    return (host, int(port)) if host and port.isdigit() else address
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    # e.g. {"hpolib": {"bench": "HPOLib", "data_path": "...", "dataset_name": "...", "quantiles": {...}}}
+    parser.add_argument("--spec", type=str, required=True)
+    parser.add_argument("--address", type=str, default="/tmp/chpobench.sock")
+    parser.add_argument("--authkey", type=str, required=True)
+    parser.add_argument("--max-batch-size", type=int, default=1024)
+    parser.add_argument("--batch-window", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    benches = {}
+    for name, kwargs in json.load(open(args.spec)).items():
+        bench_cls = getattr(chpobench, kwargs.pop("bench"))
+        benches[name] = bench_cls(**kwargs)
+
+    server = BenchServer(
+        benches,
+        address=_parse_address(args.address),
+        authkey=args.authkey.encode(),
+        max_batch_size=args.max_batch_size,
+        batch_window=args.batch_window,
+    )
+    print(f"Serving {list(benches)} at {server.address}")
+    server.serve_forever()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from typing import Any, Protocol, TYPE_CHECKING
+
+from chpobench import constants
+from chpobench.batching import evaluate_calls
+
+
+if TYPE_CHECKING:
+    from chpobench.base import BaseBench
+
+
+@dataclass(frozen=True)
+class Trial:
+    trial_id: int
+    worker_id: int
+    config: dict[str, Any]
+    fidels: dict[str, int | float] | None
+    results: dict[str, float]
+    # The virtual time when the trial started and finished on the worker.
+    start_time: float
+    end_time: float
+
+
+class AskTellOptimizer(Protocol):
+    def ask(
+        self,
+    ) -> tuple[dict[str, int | float | str | bool], dict[str, int | float] | None]: ...
+
+    def tell(self, trial: Trial) -> None: ...
+
+
+class AsyncSimulator:
+    def __init__(self, bench: BaseBench, n_workers: int, min_batch_size: int = 32):
+        # Simulate n_workers that train the configs in parallel. Each trial occupies its worker for
+        # the returned runtime in the virtual clock, so the optimizer gets the results in the order
+        # of a real asynchronous run without waiting for the training.
+        # The configs of min_batch_size or more freed workers are evaluated by query_batch.
+        if n_workers <= 0:
+            raise ValueError(f"n_workers must be positive, but got {n_workers}.")
+        if getattr(bench, "_seed_aggregation", None) == "all":
+            raise ValueError(
+                "AsyncSimulator needs one runtime per trial, but got seed_aggregation='all'."
+            )
+
+        self._bench = bench
+        self._n_workers = n_workers
+        self._min_batch_size = min_batch_size
+        # In rng_mode="counter", the seed of each trial is keyed on its trial id, so the results do
+        # not depend on how the trials are batched.
+        self._use_trial_ids = getattr(bench, "_rng_mode", None) == "counter"
+
+    def _evaluate(
+        self,
+        asks: list[tuple[dict[str, Any], dict[str, int | float] | None]],
+        trial_ids: list[int],
+    ) -> list[dict[str, float]]:
+        calls = [
+            (config, fidels, trial_id if self._use_trial_ids else None)
+            for (config, fidels), trial_id in zip(asks, trial_ids)
+        ]
+        if len(calls) < self._min_batch_size:
+            results = [self._bench(*call) for call in calls]
+        else:
+            results = []
+            for r in evaluate_calls(self._bench, calls):
+                if isinstance(r, Exception):
+                    raise r
+
+                results.append(r)
+
+        if len(results) > 0 and constants._RUNTIME_KEY not in results[0]:
+            raise KeyError(
+                f"AsyncSimulator requires {constants._RUNTIME_KEY!r} in the metrics of the "
+                f"benchmark, but got {list(results[0])}."
+            )
+
+        return results
+
+    def run(
+        self,
+        optimizer: AskTellOptimizer,
+        n_trials: int,
+        max_time: float = float("inf"),
+    ) -> list[Trial]:
+        # Return the told trials in the order of their end times. The run stops after n_trials
+        # trials or when the virtual clock passes max_time; the trials running then are not told.
+        # (end_time, trial_id, trial) so that the trials finishing at the same time keep the order.
+        running: list[tuple[float, int, Trial]] = []
+        history: list[Trial] = []
+        n_started = 0
+        now = 0.0
+        free_workers = list(range(min(self._n_workers, n_trials)))
+        while True:
+            n_asks = min(len(free_workers), n_trials - n_started)
+            asks = [optimizer.ask() for _ in range(n_asks)]
+            trial_ids = list(range(n_started, n_started + n_asks))
+            for worker_id, (config, fidels), results in zip(
+                free_workers, asks, self._evaluate(asks, trial_ids)
+            ):
+                trial = Trial(
+                    trial_id=n_started,
+                    worker_id=worker_id,
+                    config=config,
+                    fidels=fidels,
+                    results=results,
+                    start_time=now,
+                    end_time=now + results[constants._RUNTIME_KEY],
+                )
+                heapq.heappush(running, (trial.end_time, trial.trial_id, trial))
+                n_started += 1
+
+            free_workers = free_workers[n_asks:]
+            if len(running) == 0 or running[0][0] > max_time:
+                return history
+
+            now = running[0][0]
+            # Tell all the trials finishing now before asking for the next ones.
+            while len(running) > 0 and running[0][0] == now:
+                _, _, trial = heapq.heappop(running)
+                history.append(trial)
+                free_workers.append(trial.worker_id)
+                optimizer.tell(trial)
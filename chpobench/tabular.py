@@ -0,0 +1,797 @@
+from __future__ import annotations
+
+import os
+import pickle
+import shutil
+import threading
+from abc import ABCMeta, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Final, Iterator, Literal, Mapping, Sequence, TYPE_CHECKING
+
+import numpy as np
+
+from chpobench import constants
+
+
+if TYPE_CHECKING:
+    from chpobench.base import BaseBench
+
+    _MixinBase = BaseBench
+else:
+    _MixinBase = object
+
+
+_BACKENDS: Final[tuple[str, ...]] = ("dict", "dense", "mmap")
+_RNG_MODES: Final[tuple[str, ...]] = ("global", "counter")
+_SEED_AGGREGATIONS: Final[tuple[str, ...]] = ("random", "mean", "median", "all")
+_MASK64: Final[int] = 2**64 - 1
+
+
+def _splitmix64(x: int) -> int:
+    z = (x + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def _splitmix64_batch(x: np.ndarray) -> np.ndarray:
+    # The same as _splitmix64 for each element. uint64 wraps around in the same way as the masks.
+    z = x.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _epoch_keys(vals: Any) -> list[int]:
+    return sorted(vals) if isinstance(vals, dict) else list(range(len(vals)))
+
+
+def _lookup_raw(
+    vals: Any, seed: int, epochs: int | float, layout: tuple[bool, bool]
+) -> int | float:
+    per_seed, per_epoch = layout
+    vals = vals[seed] if per_seed else vals
+    return vals[epochs] if per_epoch else vals
+
+
+class ConfigEncoder:
+    def __init__(self, space: Mapping[str, Sequence[int | float | str | bool]]):
+        self._names = list(space)
+        self._choices = [list(choices) for choices in space.values()]
+        self._radices = [len(choices) for choices in self._choices]
+        self._n_configs = int(np.prod(self._radices))
+        strides = np.cumprod([1] + self._radices[:0:-1])[::-1].tolist()
+        self._code_maps: list[dict[int | float | str | bool, int]] = []
+        for choices in self._choices:
+            code_map: dict[int | float | str | bool, int] = {}
+            for code, choice in enumerate(choices):
+                # Keep the first match like list.index.
+                code_map.setdefault(choice, code)
+            self._code_maps.append(code_map)
+
+        self._key_maps = [
+            {v: str(code) for v, code in code_map.items()}
+            for code_map in self._code_maps
+        ]
+        self._id_maps = [
+            {v: code * stride for v, code in code_map.items()}
+            for code_map, stride in zip(self._code_maps, strides)
+        ]
+
+    @property
+    def names(self) -> list[str]:
+        return self._names[:]
+
+    @property
+    def radices(self) -> list[int]:
+        return self._radices[:]
+
+    @property
+    def n_configs(self) -> int:
+        return self._n_configs
+
+    def encode(self, config: dict[str, int | float | str | bool]) -> list[int]:
+        return [m[config[name]] for name, m in zip(self._names, self._code_maps)]
+
+    def encode_id(self, config: dict[str, int | float | str | bool]) -> int:
+        return sum(m[config[name]] for name, m in zip(self._names, self._id_maps))
+
+    def encode_key(self, config: dict[str, int | float | str | bool]) -> str:
+        return "".join(m[config[name]] for name, m in zip(self._names, self._key_maps))
+
+    def encode_batch(self, configs: dict[str, np.ndarray]) -> np.ndarray:
+        n_configs = len(configs[self._names[0]]) if len(self._names) > 0 else 0
+        codes = np.full((len(self._names), n_configs), -1)
+        for d, (name, choices) in enumerate(zip(self._names, self._choices)):
+            vals = configs[name]
+            for code, choice in enumerate(choices):
+                codes[d, vals == choice] = code
+
+        if np.any(codes < 0):
+            d, i = np.argwhere(codes < 0)[0]
+            raise KeyError(f"{self._names[d]}={configs[self._names[d]][i]}")
+
+        return codes
+
+    def to_ids(self, codes: np.ndarray) -> np.ndarray:
+        return np.ravel_multi_index(codes, self._radices)
+
+    def to_keys(self, codes: np.ndarray) -> list[str]:
+        return ["".join(map(str, config_codes)) for config_codes in codes.T.tolist()]
+
+    def decode(self, config_id: int) -> dict[str, int | float | str | bool]:
+        codes = np.unravel_index(config_id, self._radices)
+        return {
+            name: choices[int(code)]
+            for name, choices, code in zip(self._names, self._choices, codes)
+        }
+
+    def decode_batch(self, config_ids: np.ndarray) -> dict[str, np.ndarray]:
+        codes = np.unravel_index(config_ids, self._radices)
+        return {
+            name: np.asarray(choices)[code]
+            for name, choices, code in zip(self._names, self._choices, codes)
+        }
+
+
+@dataclass(frozen=True)
+class DenseTable:
+    # Each metric has the shape of (n_configs, n_seeds, n_epochs) and is indexed by the mixed-radix
+    # config id. n_seeds and/or n_epochs are 1 if the metric does not depend on them.
+    metrics: dict[str, np.ndarray]
+    epochs: np.ndarray
+    exists: np.ndarray
+    _epoch_indices: dict[int | float, int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        epoch_indices = {e: i for i, e in enumerate(self.epochs.tolist())}
+        object.__setattr__(self, "_epoch_indices", epoch_indices)
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: dict[str, dict[str, Any]],
+        radices: list[int],
+        layouts: dict[str, tuple[bool, bool]],
+    ) -> DenseTable:
+        n_configs = int(np.prod(radices))
+        sample = next(iter(data.values()))
+        n_seeds, epochs = 1, []
+        for key, (per_seed, per_epoch) in layouts.items():
+            vals = sample[key]
+            n_seeds = len(vals) if per_seed else n_seeds
+            if per_epoch:
+                epochs = _epoch_keys(vals[0] if per_seed else vals)
+
+        metrics = {
+            key: np.full(
+                (
+                    n_configs,
+                    n_seeds if per_seed else 1,
+                    len(epochs) if per_epoch else 1,
+                ),
+                np.nan,
+            )
+            for key, (per_seed, per_epoch) in layouts.items()
+        }
+        exists = np.zeros(n_configs, dtype=bool)
+        for index, query in data.items():
+            config_id = 0
+            for digit, radix in zip(index, radices):
+                config_id = config_id * radix + int(digit)
+
+            exists[config_id] = True
+            for key, (per_seed, per_epoch) in layouts.items():
+                vals = query[key] if per_seed else [query[key]]
+                metrics[key][config_id] = [
+                    [v[e] for e in epochs] if per_epoch else [v] for v in vals
+                ]
+
+        return cls(metrics=metrics, epochs=np.asarray(epochs), exists=exists)
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(os.path.join(tmp_path, "metrics"))
+        np.save(os.path.join(tmp_path, "epochs.npy"), self.epochs)
+        np.save(os.path.join(tmp_path, "exists.npy"), self.exists)
+        for key, vals in self.metrics.items():
+            np.save(os.path.join(tmp_path, "metrics", f"{key}.npy"), vals)
+
+        # Replace at once so that other processes never see a partially written table.
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(
+        cls, path: str, keys: list[str] | None = None, mmap: bool = True
+    ) -> DenseTable:
+        if not os.path.isdir(path):
+            raise FileNotFoundError(
+                f"{path} does not exist. Please create it by `create_dense_store` first."
+            )
+
+        mmap_mode: Literal["r"] | None = "r" if mmap else None
+        keys = (
+            [name[:-4] for name in os.listdir(os.path.join(path, "metrics"))]
+            if keys is None
+            else keys
+        )
+        return cls(
+            metrics={
+                key: np.load(
+                    os.path.join(path, "metrics", f"{key}.npy"), mmap_mode=mmap_mode
+                )
+                for key in keys
+            },
+            epochs=np.load(os.path.join(path, "epochs.npy")),
+            exists=np.load(os.path.join(path, "exists.npy")),
+        )
+
+    def aggregate_seeds(self, how: Literal["mean", "median"]) -> DenseTable:
+        aggregate = np.mean if how == "mean" else np.median
+        return DenseTable(
+            metrics={
+                key: aggregate(vals, axis=1, keepdims=True)
+                for key, vals in self.metrics.items()
+            },
+            epochs=self.epochs,
+            exists=self.exists,
+        )
+
+    def epoch_index(self, epochs: int | float | np.ndarray) -> int | np.ndarray:
+        if not isinstance(epochs, np.ndarray) and epochs in self._epoch_indices:
+            return self._epoch_indices[epochs]
+        if self.epochs.size == 0:
+            # No metric depends on epochs.
+            return np.zeros_like(epochs)
+
+        indices = np.clip(np.searchsorted(self.epochs, epochs), 0, self.epochs.size - 1)
+        missing = self.epochs[indices] != epochs
+        if np.any(missing):
+            raise ValueError(
+                f"epochs={np.asarray(epochs)[missing].ravel()[0]} is not stored in the table. "
+                f"Available epochs: {self.epochs.tolist()}"
+            )
+        return indices
+
+    def take(
+        self,
+        key: str,
+        config_ids: int | np.ndarray,
+        seeds: int | np.ndarray,
+        epoch_indices: int | np.ndarray,
+    ) -> np.ndarray:
+        vals = self.metrics[key]
+        return vals[
+            config_ids,
+            seeds if vals.shape[1] > 1 else 0,
+            epoch_indices if vals.shape[2] > 1 else 0,
+        ]
+
+
+# NOTE: This is not a subclass of BaseBench, because ABCMeta evaluates the abstract classmethod
+# properties of BaseBench when an intermediate abstract class is defined.
+class TabularBenchMixin(_MixinBase, metaclass=ABCMeta):
+    _discrete_space: dict[str, list[int | float | bool | str]]
+    _encoder: ConfigEncoder
+    _N_SEEDS: int
+    _MAX_EPOCHS: int
+    # Mapping from the public metric names to the keys in the pickle data.
+    _RAW_KEYS: dict[str, str]
+    # Whether each raw metric is stored per seed and per epoch.
+    _RAW_LAYOUTS: dict[str, tuple[bool, bool]]
+    _INSTRUMENTED_STAGES: dict[str, str] = {
+        "_validate_input": "validation",
+        "_validate_batch": "validation",
+        "_find": "encoding",
+        "_find_batch": "encoding",
+        "_lookup": "lookup",
+        "_lookup_batch": "lookup",
+    }
+
+    def __init__(
+        self,
+        data_path: str,
+        dataset_name: str,
+        quantiles: dict[str, float],
+        metric_names: list[str] | None = None,
+        seed: int | None = None,
+        trust_input: bool = False,
+        backend: Literal["dict", "dense", "mmap"] = "dict",
+        rng_mode: Literal["global", "counter"] = "global",
+        seed_aggregation: Literal["random", "mean", "median", "all"] = "random",
+    ):
+        if backend not in _BACKENDS:
+            raise ValueError(f"backend must be in {_BACKENDS}, but got {backend}.")
+        if rng_mode not in _RNG_MODES:
+            raise ValueError(f"rng_mode must be in {_RNG_MODES}, but got {rng_mode}.")
+        if seed_aggregation not in _SEED_AGGREGATIONS:
+            raise ValueError(
+                f"seed_aggregation must be in {_SEED_AGGREGATIONS}, but got {seed_aggregation}."
+            )
+
+        self._backend = backend
+        self._rng_mode = rng_mode
+        # "random" returns the values of a random seed, "mean" and "median" aggregate over the seeds
+        # and "all" returns the values of all the seeds as an array.
+        self._seed_aggregation = seed_aggregation
+        # The dense backend stores the aggregates instead of the values of each seed.
+        self._aggregated_table = backend == "dense" and seed_aggregation in (
+            "mean",
+            "median",
+        )
+        self._counter_lock = threading.Lock()
+        self._init_counter(seed)
+        super().__init__(
+            data_path=data_path,
+            dataset_name=dataset_name,
+            quantiles=quantiles,
+            metric_names=metric_names,
+            seed=seed,
+            trust_input=trust_input,
+        )
+
+    def _init_counter(self, seed: int | None) -> None:
+        # In the counter mode, the seed of a query is a hash of (seed, config id, call index), where
+        # call index counts the queries of each config. The results depend neither on the queries
+        # of the other configs nor on their order, so threads can share this instance. A query with
+        # trial_id uses a hash of (seed, trial id) instead and does not touch the call counts.
+        if self._rng_mode != "counter":
+            return
+        entropy = np.random.SeedSequence().entropy if seed is None else seed
+        assert isinstance(entropy, (int, np.integer))  # mypy redefinition.
+        with self._counter_lock:
+            self._counter_key = _splitmix64(int(entropy) & _MASK64)
+            self._call_counts = np.zeros(self._get_encoder().n_configs, dtype=np.int64)
+
+    def reseed(self, seed: int) -> None:
+        super().reseed(seed)
+        self._init_counter(seed)
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_counter_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._counter_lock = threading.Lock()
+
+    def _counter_seed(self, config_id: int) -> int:
+        with self._counter_lock:
+            call_index = int(self._call_counts[config_id])
+            self._call_counts[config_id] += 1
+
+        key = _splitmix64(self._counter_key ^ config_id)
+        return _splitmix64(key ^ call_index) % self._N_SEEDS
+
+    def _counter_seeds(self, config_ids: np.ndarray) -> np.ndarray:
+        # Repeated configs in a batch get consecutive call indices in the batch order.
+        uniq_ids, inverse, counts = np.unique(
+            config_ids, return_inverse=True, return_counts=True
+        )
+        n_queries = config_ids.size
+        ranks = np.empty(n_queries, dtype=np.int64)
+        ranks[np.argsort(inverse, kind="stable")] = np.arange(n_queries) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        with self._counter_lock:
+            call_indices = self._call_counts[uniq_ids][inverse] + ranks
+            self._call_counts[uniq_ids] += counts
+
+        keys = _splitmix64_batch(
+            np.uint64(self._counter_key) ^ config_ids.astype(np.uint64)
+        )
+        seeds = _splitmix64_batch(keys ^ call_indices.astype(np.uint64))
+        return (seeds % np.uint64(self._N_SEEDS)).astype(int)
+
+    def _trial_seeds(self, trial_ids: np.ndarray) -> np.ndarray:
+        # Any copy of this instance, e.g. in another process, gives the same seeds to the same ids.
+        key = np.uint64(_splitmix64(self._counter_key))
+        seeds = _splitmix64_batch(key ^ trial_ids.astype(np.uint64))
+        return (seeds % np.uint64(self._N_SEEDS)).astype(int)
+
+    def _validate_trial_ids(self, trial_ids: Any) -> None:
+        if trial_ids is not None and self._rng_mode != "counter":
+            raise ValueError(
+                f"trial_id requires rng_mode='counter', but got rng_mode={self._rng_mode!r}."
+            )
+
+    @classmethod
+    def _dense_store_path(cls, data_path: str, dataset_name: str) -> str:
+        return os.path.join(data_path, f"{dataset_name}_dense")
+
+    @classmethod
+    def create_dense_store(cls, data_path: str, dataset_name: str) -> None:
+        data = pickle.load(
+            open(os.path.join(data_path, f"{dataset_name}.pkl"), mode="rb")
+        )
+        table = DenseTable.from_dict(
+            data, radices=cls._get_encoder().radices, layouts=cls._RAW_LAYOUTS
+        )
+        table.save(cls._dense_store_path(data_path, dataset_name))
+        bench = cls(data_path, dataset_name, quantiles={}, backend="mmap")
+        bench.save_constraint_index()
+        bench.save_pareto_front_index()
+
+    def _init_bench(self) -> None:
+        raw_keys = [
+            self._RAW_KEYS[name]
+            for name in self._metric_names
+            if name in self._RAW_KEYS
+        ]
+        if self._backend == "mmap":
+            self._table = DenseTable.load(
+                self._dense_store_path(self._data_path, self._dataset_name),
+                keys=raw_keys,
+            )
+            return
+
+        data = pickle.load(
+            open(os.path.join(self._data_path, f"{self._dataset_name}.pkl"), mode="rb")
+        )
+        if self._backend == "dict":
+            self._data = data
+            return
+
+        self._table = DenseTable.from_dict(
+            data,
+            radices=self._get_encoder().radices,
+            layouts={key: self._RAW_LAYOUTS[key] for key in raw_keys},
+        )
+        if self._aggregated_table:
+            assert self._seed_aggregation in ("mean", "median")  # mypy redefinition.
+            self._table = self._table.aggregate_seeds(self._seed_aggregation)
+
+    def _load_population(self) -> dict[str, np.ndarray]:
+        # All the seeds of all the configs at the max epochs as in the metadata.
+        names = [constants._LOSS_KEY, *self.avail_constraint_names]
+        keys = [self._RAW_KEYS[name] for name in names]
+        if self._backend == "mmap":
+            table = DenseTable.load(
+                self._dense_store_path(self._data_path, self._dataset_name), keys=keys
+            )
+        elif (
+            self._backend == "dense"
+            and not self._aggregated_table
+            and all(k in self._table.metrics for k in keys)
+        ):
+            table = self._table
+        else:
+            data = (
+                self._data
+                if self._backend == "dict"
+                else pickle.load(
+                    open(
+                        os.path.join(self._data_path, f"{self._dataset_name}.pkl"),
+                        mode="rb",
+                    )
+                )
+            )
+            return {
+                name: self._transform(
+                    name,
+                    np.asarray(
+                        [
+                            _lookup_raw(
+                                query[key],
+                                seed=seed,
+                                epochs=self._MAX_EPOCHS,
+                                layout=self._RAW_LAYOUTS[key],
+                            )
+                            for query in data.values()
+                            for seed in range(self._N_SEEDS)
+                        ],
+                        dtype=float,
+                    ),
+                    self._MAX_EPOCHS,
+                )
+                for name, key in zip(names, keys)
+            }
+
+        config_ids = np.flatnonzero(table.exists)[:, np.newaxis]
+        seeds = np.arange(self._N_SEEDS)
+        epoch_index = table.epoch_index(self._MAX_EPOCHS)
+        shape = (config_ids.size, self._N_SEEDS)
+        return {
+            name: self._transform(
+                name,
+                np.broadcast_to(
+                    table.take(key, config_ids, seeds, epoch_index), shape
+                ).ravel(),
+                self._MAX_EPOCHS,
+            )
+            for name, key in zip(names, keys)
+        }
+
+    @abstractmethod
+    def _validate_epochs(self, epochs: int | float) -> None:
+        raise NotImplementedError
+
+    def _transform(
+        self, metric_name: str, vals: Any, epochs: int | float | np.ndarray
+    ) -> Any:
+        return vals
+
+    @classmethod
+    def _get_encoder(cls) -> ConfigEncoder:
+        if "_encoder" not in cls.__dict__:
+            cls._encoder = ConfigEncoder(cls._discrete_space)
+
+        return cls._encoder
+
+    def _find(self, config: dict[str, int | float | str | bool]) -> Any:
+        encoder = self._get_encoder()
+        if self._backend == "dict":
+            return self._data[encoder.encode_key(config)]
+
+        config_id = encoder.encode_id(config)
+        if not self._table.exists[config_id]:
+            raise KeyError(config_id)
+
+        return config_id
+
+    def _config_id(
+        self, config: dict[str, int | float | str | bool], query: Any
+    ) -> int:
+        # query of the dict backend is the raw data of the config.
+        if self._backend == "dict":
+            return self._get_encoder().encode_id(config)
+
+        return query
+
+    def _lookup(self, query: Any, seed: int, epochs: int | float) -> dict[str, Any]:
+        metric_names = [name for name in self._RAW_KEYS if name in self._metric_names]
+        if self._backend == "dict":
+            return {
+                name: _lookup_raw(
+                    query[self._RAW_KEYS[name]],
+                    seed=seed,
+                    epochs=epochs,
+                    layout=self._RAW_LAYOUTS[self._RAW_KEYS[name]],
+                )
+                for name in metric_names
+            }
+
+        epoch_index = self._table.epoch_index(epochs)
+        return {
+            name: float(
+                self._table.take(self._RAW_KEYS[name], query, seed, epoch_index)
+            )
+            for name in metric_names
+        }
+
+    def _find_batch(self, configs: dict[str, np.ndarray]) -> Any:
+        encoder = self._get_encoder()
+        codes = encoder.encode_batch(configs)
+        if self._backend == "dict":
+            return [self._data[key] for key in encoder.to_keys(codes)]
+
+        config_ids = encoder.to_ids(codes)
+        missing = ~self._table.exists[config_ids]
+        if np.any(missing):
+            raise KeyError(config_ids[missing][0])
+
+        return config_ids
+
+    def _lookup_batch(
+        self, queries: Any, seeds: np.ndarray, epochs: np.ndarray
+    ) -> dict[str, np.ndarray]:
+        metric_names = [name for name in self._RAW_KEYS if name in self._metric_names]
+        if self._backend == "dict":
+            return {
+                name: np.asarray(
+                    [
+                        _lookup_raw(
+                            query[self._RAW_KEYS[name]],
+                            seed=seed,
+                            epochs=e,
+                            layout=self._RAW_LAYOUTS[self._RAW_KEYS[name]],
+                        )
+                        for query, seed, e in zip(
+                            queries, seeds.tolist(), epochs.tolist()
+                        )
+                    ],
+                    dtype=float,
+                )
+                for name in metric_names
+            }
+
+        epoch_indices = self._table.epoch_index(epochs)
+        return {
+            name: self._table.take(self._RAW_KEYS[name], queries, seeds, epoch_indices)
+            for name in metric_names
+        }
+
+    def _lookup_seed_aggregates(
+        self, queries: Any, epochs: np.ndarray
+    ) -> dict[str, np.ndarray]:
+        # The aggregates over the seeds in the shape of (n_queries, ) or all the seeds in the shape
+        # of (n_queries, n_seeds).
+        n_queries = epochs.size
+        if self._aggregated_table:
+            seeds = np.zeros(n_queries, dtype=int)
+            return self._lookup_batch(queries, seeds=seeds, epochs=epochs)
+
+        n_seeds = self._N_SEEDS
+        raw = self._lookup_batch(
+            (
+                [query for query in queries for _ in range(n_seeds)]
+                if self._backend == "dict"
+                else np.repeat(queries, n_seeds)
+            ),
+            seeds=np.tile(np.arange(n_seeds), n_queries),
+            epochs=np.repeat(epochs, n_seeds),
+        )
+        vals = {name: v.reshape(n_queries, n_seeds) for name, v in raw.items()}
+        if self._seed_aggregation == "all":
+            return vals
+
+        aggregate = np.mean if self._seed_aggregation == "mean" else np.median
+        return {name: aggregate(v, axis=1) for name, v in vals.items()}
+
+    def _query_batch(
+        self,
+        configs: dict[str, np.ndarray],
+        fidels: dict[str, np.ndarray],
+        n_configs: int,
+        trial_ids: np.ndarray | None = None,
+    ) -> dict[str, np.ndarray]:
+        self._validate_trial_ids(trial_ids)
+        epochs = fidels.get(constants._EPOCHS_KEY, np.full(n_configs, self._MAX_EPOCHS))
+        aggregates = self._seed_aggregation != "random"
+        if not aggregates and self._rng_mode == "global":
+            seeds = self._rng.randint(self._N_SEEDS, size=n_configs)
+        try:
+            queries = self._find_batch(configs)
+        except KeyError as e:
+            raise KeyError(f"{self.__class__.__name__} does not have the config: {e}")
+
+        for epoch in np.unique(epochs).tolist():
+            self._validate_epochs(epoch)
+
+        # Cast after the validation so that fractional epochs raise instead of being truncated.
+        epochs = epochs.astype(int)
+        if aggregates:
+            return self._lookup_transformed(queries, epochs=epochs)
+        if trial_ids is not None:
+            seeds = self._trial_seeds(trial_ids)
+        elif self._rng_mode == "counter":
+            encoder = self._get_encoder()
+            seeds = self._counter_seeds(
+                encoder.to_ids(encoder.encode_batch(configs))
+                if self._backend == "dict"
+                else queries
+            )
+
+        return self._lookup_transformed(queries, epochs=epochs, seeds=seeds)
+
+    def _lookup_transformed(
+        self, queries: Any, epochs: np.ndarray, seeds: np.ndarray | None = None
+    ) -> dict[str, np.ndarray]:
+        # seeds is used only if seed_aggregation="random".
+        if self._seed_aggregation == "random":
+            assert seeds is not None  # mypy redefinition.
+            raw = self._lookup_batch(queries, seeds=seeds, epochs=epochs)
+        else:
+            raw = self._lookup_seed_aggregates(queries, epochs=epochs)
+            if self._seed_aggregation == "all":
+                epochs = epochs[:, np.newaxis]
+
+        return {name: self._transform(name, v, epochs) for name, v in raw.items()}
+
+    def iter_grid(
+        self, chunk_size: int = 2**16, epochs: int | None = None
+    ) -> Iterator[tuple[np.ndarray, dict[str, np.ndarray], dict[str, np.ndarray]]]:
+        # Yield (config ids, configs, results) of every tabulated config in the order of the config
+        # ids, where configs and results are dicts of arrays with up to chunk_size elements.
+        # The seeds follow rng_mode and seed_aggregation as in query_batch.
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, but got {chunk_size}.")
+
+        epochs = self._MAX_EPOCHS if epochs is None else epochs
+        self._validate_epochs(epochs)
+        encoder = self._get_encoder()
+        for start in range(0, encoder.n_configs, chunk_size):
+            config_ids = np.arange(start, min(start + chunk_size, encoder.n_configs))
+            if self._backend == "dict":
+                keys = encoder.to_keys(
+                    np.stack(np.unravel_index(config_ids, encoder.radices))
+                )
+                exists = np.asarray([key in self._data for key in keys], dtype=bool)
+                config_ids = config_ids[exists]
+                queries = [self._data[key] for key in keys if key in self._data]
+            else:
+                config_ids = config_ids[self._table.exists[config_ids]]
+                queries = config_ids
+            if config_ids.size == 0:
+                continue
+
+            seeds = None
+            if self._seed_aggregation == "random":
+                seeds = (
+                    self._rng.randint(self._N_SEEDS, size=config_ids.size)
+                    if self._rng_mode == "global"
+                    else self._counter_seeds(config_ids)
+                )
+
+            results = self._lookup_transformed(
+                queries, epochs=np.full(config_ids.size, epochs), seeds=seeds
+            )
+            yield config_ids, encoder.decode_batch(config_ids), results
+
+    def _query_curve(
+        self,
+        config: dict[str, int | float | str | bool],
+        epochs: np.ndarray,
+        fidels: dict[str, int | float],
+    ) -> dict[str, np.ndarray]:
+        aggregates = self._seed_aggregation != "random"
+        if not aggregates and self._rng_mode == "global":
+            seed = self._rng.randint(self._N_SEEDS)
+        try:
+            query = self._find(config)
+        except KeyError:
+            raise KeyError(
+                f"{self.__class__.__name__} does not have the config: {config}"
+            )
+
+        for epoch in np.unique(epochs).tolist():
+            self._validate_epochs(epoch)
+
+        epochs = epochs.astype(int)
+        n_epochs = epochs.size
+        # Look up the same config at every epochs in one batch.
+        queries = (
+            [query] * n_epochs if self._backend == "dict" else np.full(n_epochs, query)
+        )
+        if aggregates:
+            return self._lookup_transformed(queries, epochs=epochs)
+        if self._rng_mode == "counter":
+            seed = self._counter_seed(self._config_id(config, query))
+
+        seeds = np.full(n_epochs, seed)
+        return self._lookup_transformed(queries, epochs=epochs, seeds=seeds)
+
+    def _evaluate(
+        self,
+        config: dict[str, int | float | str | bool],
+        fidels: dict[str, int | float] | None = None,
+        trial_id: int | None = None,
+    ) -> dict[str, float]:
+        self._validate_trial_ids(trial_id)
+        fidels = {} if fidels is None else fidels.copy()
+        self._validate_input(config, fidels)
+        epochs = fidels.get(constants._EPOCHS_KEY, self._MAX_EPOCHS)
+        aggregates = self._seed_aggregation != "random"
+        if not aggregates and self._rng_mode == "global":
+            seed = self._rng.randint(self._N_SEEDS)
+        try:
+            query = self._find(config)
+        except KeyError:
+            raise KeyError(
+                f"{self.__class__.__name__} does not have the config: {config}"
+            )
+
+        self._validate_epochs(epochs)
+        if self._aggregated_table:
+            # The precomputed aggregates cost the same as one seed.
+            raw = self._lookup(query, seed=0, epochs=epochs)
+        elif aggregates:
+            raw = {
+                name: v[0] if self._seed_aggregation == "all" else float(v[0])
+                for name, v in self._lookup_seed_aggregates(
+                    [query] if self._backend == "dict" else np.asarray([query]),
+                    epochs=np.asarray([epochs]),
+                ).items()
+            }
+        else:
+            if trial_id is not None:
+                seed = int(self._trial_seeds(np.asarray([trial_id]))[0])
+            elif self._rng_mode == "counter":
+                seed = self._counter_seed(self._config_id(config, query))
+
+            raw = self._lookup(query, seed=seed, epochs=epochs)
+
+        return {name: self._transform(name, v, epochs) for name, v in raw.items()}
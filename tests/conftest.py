@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import os
+import pickle
+from typing import Any
+
+import pytest
+
+from _src._benchmark_fixtures import HPOLIB_DATASET, make_hpolib_fixture
+from chpobench import HPOLib
+
+
+@pytest.fixture(scope="session")
+def hpolib_data_path(tmp_path_factory: pytest.TempPathFactory) -> str:
+    # A few configs of HPOLib are enough for the unit tests.
+    data_path = str(tmp_path_factory.mktemp("hpolib"))
+    make_hpolib_fixture(data_path, n_configs=64)
+    return data_path
+
+
+@pytest.fixture(scope="session")
+def hpolib_configs(hpolib_data_path: str) -> list[dict[str, Any]]:
+    with open(os.path.join(hpolib_data_path, f"{HPOLIB_DATASET}.pkl"), mode="rb") as f:
+        indices = list(pickle.load(f))
+
+    choices = list(HPOLib.discrete_space.values())
+    return [
+        {
+            name: choices[d][int(code)]
+            for d, (name, code) in enumerate(zip(HPOLib.discrete_space, index))
+        }
+        for index in indices
+    ]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+
+import pytest
+
+from _src._benchmark_fixtures import HPOLIB_DATASET
+from chpobench import HPOLib
+from chpobench.batching import AsyncBatcher
+
+
+def test_close_shuts_down_own_executor(
+    hpolib_data_path: str, hpolib_configs: list[dict[str, Any]]
+) -> None:
+    bench = HPOLib(hpolib_data_path, HPOLIB_DATASET, quantiles={}, seed=0)
+    asyncio.run(bench.aquery(hpolib_configs[0]))
+    batcher = bench._async_batcher
+    assert batcher is not None
+    bench.close()
+    assert bench._async_batcher is None
+    with pytest.raises(RuntimeError):
+        batcher._executor.submit(print)
+
+    # aquery after close starts a new batcher.
+    asyncio.run(bench.aquery(hpolib_configs[0]))
+    bench.close()
+
+
+def test_context_keeps_given_executor(
+    hpolib_data_path: str, hpolib_configs: list[dict[str, Any]]
+) -> None:
+    bench = HPOLib(hpolib_data_path, HPOLIB_DATASET, quantiles={}, seed=0)
+
+    async def _query(executor: ThreadPoolExecutor | None) -> AsyncBatcher:
+        async with AsyncBatcher(bench, executor=executor) as batcher:
+            await asyncio.gather(*(batcher.query(c) for c in hpolib_configs[:4]))
+
+        return batcher
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(_query(None))._executor.submit(print)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        asyncio.run(_query(executor))
+        assert executor.submit(lambda: 1).result() == 1
+
+
+@pytest.mark.parametrize("backend", ["dict", "dense"])
+def test_aquery_all_seeds(
+    hpolib_data_path: str, hpolib_configs: list[dict[str, Any]], backend: str
+) -> None:
+    bench = HPOLib(
+        hpolib_data_path,
+        HPOLIB_DATASET,
+        quantiles={},
+        seed=0,
+        seed_aggregation="all",
+        backend=backend,
+    )
+
+    async def _query_all() -> list[dict[str, Any]]:
+        return await asyncio.gather(*(bench.aquery(c) for c in hpolib_configs[:8]))
+
+    # The merged batch must keep the seed axis of each row.
+    for config, results in zip(hpolib_configs, asyncio.run(_query_all())):
+        expected = bench(config)
+        assert set(results) == set(expected)
+        for name, vals in results.items():
+            assert np.array_equal(vals, expected[name])
+
+    bench.close()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+import pandas as pd
+
+from _src._collector import ObjectiveNames, build_databases
+
+
+@dataclass(frozen=True)
+class _ObjectiveNames(ObjectiveNames):
+    loss: str = "loss"
+    runtime: str = "runtime"
+    model_size: str | None = "model_size"
+
+
+_N_TOTAL = 1000
+
+
+def _get_dataframe(data_path: str) -> pd.DataFrame:
+    rng = np.random.RandomState(int(data_path))
+    return pd.DataFrame(
+        {
+            name: rng.random_sample(_N_TOTAL)
+            for name in ["loss", "runtime", "model_size"]
+        }
+    )
+
+
+def test_build_databases_rebuilds_store(tmp_path: str) -> None:
+    target_dir = str(tmp_path)
+    for seed in [0, 1]:
+        # The second build overwrites the CSV, and the store must follow it.
+        build_databases(
+            _get_dataframe,
+            data_paths={"toy": str(seed)},
+            target_dir=target_dir,
+            obj_names=_ObjectiveNames(),
+            n_total=_N_TOTAL,
+            max_workers=1,
+        )
+        df = pd.read_csv(os.path.join(target_dir, "toy.csv"))
+        with np.load(os.path.join(target_dir, "constraint_info.npz")) as store:
+            assert store["toy.columns"].tolist() == df.columns.tolist()
+            assert np.array_equal(
+                store["toy"], df.to_numpy(dtype=np.float64), equal_nan=True
+            )
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import itertools
+
+import numpy as np
+
+import pandas as pd
+
+import pytest
+
+from _src._collector import Collector, ObjectiveNames
+from chpobench.constraint_stats import compute_grid_stats
+
+
+def _grid_stats_by_masks(
+    loss: np.ndarray,
+    constraint_vals: list[np.ndarray],
+    thresholds: list[np.ndarray],
+    top_vals: list[float],
+) -> dict[str, np.ndarray]:
+    # The loops of the original Collector that mask the samples for each threshold combination.
+    shape = tuple(len(th) for th in thresholds)
+    optimal_vals = np.full(shape, np.nan)
+    feasible_ratios = np.zeros(shape)
+    overlaps = np.zeros((len(top_vals), *shape))
+    for indices in itertools.product(*(range(n) for n in shape)):
+        mask = np.ones(loss.size, dtype=bool)
+        for vals, th, i in zip(constraint_vals, thresholds, indices):
+            mask &= vals <= th[i]
+
+        # pandas.Series.min skips NaN as in the original Collector.
+        optimal_vals[indices] = pd.Series(loss[mask]).min()
+        feasible_ratios[indices] = np.sum(mask) / mask.size
+        for k, top_val in enumerate(top_vals):
+            overlaps[(k, *indices)] = np.sum(loss[mask] <= top_val) / mask.size
+
+    return {
+        "optimal_val": optimal_vals,
+        "feasible_ratio": feasible_ratios,
+        "top_overlaps": overlaps,
+    }
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("n_constraints", [1, 2, 3])
+def test_compute_grid_stats_matches_masks(seed: int, n_constraints: int) -> None:
+    rng = np.random.RandomState(seed)
+    n_samples = 200
+    # Few distinct values make ties between the samples and with the thresholds.
+    loss = rng.randint(10, size=n_samples).astype(float)
+    constraint_vals = [
+        rng.randint(8, size=n_samples).astype(float) for _ in range(n_constraints)
+    ]
+    loss[rng.choice(n_samples, size=20, replace=False)] = np.nan
+    for vals in constraint_vals:
+        vals[rng.choice(n_samples, size=10, replace=False)] = np.nan
+
+    # Unsorted and duplicated thresholds, including the ones that no sample satisfies.
+    thresholds = [rng.randint(-1, 9, size=6).astype(float) for _ in constraint_vals]
+    top_vals = [1.0, 4.0]
+    actual = compute_grid_stats(loss, constraint_vals, thresholds, top_vals=top_vals)
+    expected = _grid_stats_by_masks(loss, constraint_vals, thresholds, top_vals)
+    for key, vals in expected.items():
+        assert np.array_equal(actual[key], vals, equal_nan=True), key
+
+
+def test_collector_negates_precision() -> None:
+    class _ObjectiveNames(ObjectiveNames):
+        loss = "loss"
+        runtime = "runtime"
+        precision = "precision"
+
+    rng = np.random.RandomState(0)
+    n_total = 1000
+    df = pd.DataFrame(
+        {
+            "loss": rng.randint(20, size=n_total).astype(float),
+            "runtime": rng.randint(20, size=n_total).astype(float),
+            "precision": rng.randint(20, size=n_total).astype(float),
+        }
+    )
+    quantiles = [0.1, 0.5, 1.0]
+    db = Collector(_ObjectiveNames(), n_total, quantiles=quantiles).create_database(df)
+    for row in db.itertuples(index=False):
+        mask = (df["precision"] >= row.precision_threshold) & (
+            df["runtime"] <= row.runtime_threshold
+        )
+        assert row.feasible_ratio == np.sum(mask) / n_total
+        assert row.optimal_val == df[mask]["loss"].min()
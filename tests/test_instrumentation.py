@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+import pytest
+
+from _src._benchmark_fixtures import HPOLIB_DATASET
+from chpobench import HPOLib
+
+
+def test_curve_runtime(
+    hpolib_data_path: str, hpolib_configs: list[dict[str, Any]]
+) -> None:
+    bench = HPOLib(hpolib_data_path, HPOLIB_DATASET, quantiles={}, seed=0)
+    inst = bench.enable_instrumentation()
+    curve = bench.query_curve(hpolib_configs[0], epochs=[50, 100, 10])
+
+    # The runtime is cumulative over the epochs, so the curve costs its longest epoch.
+    assert inst.stats["n_queries"] == 3
+    assert inst.stats["cumulative_runtime"] == pytest.approx(curve["runtime"][1])
+
+
+def test_all_seeds_runtime(
+    hpolib_data_path: str, hpolib_configs: list[dict[str, Any]]
+) -> None:
+    bench = HPOLib(
+        hpolib_data_path, HPOLIB_DATASET, quantiles={}, seed=0, seed_aggregation="all"
+    )
+    inst = bench.enable_instrumentation()
+    results = bench(hpolib_configs[0])
+    batch = bench.query_batch(hpolib_configs[:4])
+    curve = bench.query_curve(hpolib_configs[0], epochs=[10, 100])
+
+    # Each query trains one seed, so it costs the mean runtime over the seeds.
+    assert inst.stats["n_queries"] == 7
+    assert inst.stats["cumulative_runtime"] == pytest.approx(
+        np.mean(results["runtime"])
+        + np.sum(np.mean(batch["runtime"], axis=-1))
+        + np.mean(curve["runtime"][-1])
+    )
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import os
+from typing import Any
+
+import numpy as np
+
+import pytest
+
+from chpobench import JAHSBench201
+from chpobench.cache import PredictionCache
+
+
+def _make_bench(cache: PredictionCache) -> JAHSBench201:
+    # The surrogates need jahs_bench, so build the instance only with what _predict_batch uses.
+    bench = object.__new__(JAHSBench201)
+    bench._cache = cache
+    bench._dataset_name = "cifar10"
+    bench._metric_names = JAHSBench201.avail_obj_names
+    return bench
+
+
+def _make_configs(n_configs: int, trivial_augment: Any) -> dict[str, np.ndarray]:
+    config = {name: choices[0] for name, choices in JAHSBench201.discrete_space.items()}
+    config.update(LearningRate=0.1, WeightDecay=1e-3, TrivialAugment=trivial_augment)
+    return {name: np.asarray([v] * n_configs) for name, v in config.items()}
+
+
+def test_predict_batch_deduplicates_misses(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    n_rows: list[int] = []
+
+    def _run_surrogates(
+        configs: dict[str, np.ndarray], epochs: np.ndarray, resols: np.ndarray
+    ) -> dict[str, np.ndarray]:
+        n_rows.append(epochs.size)
+        return {name: epochs.astype(float) for name in JAHSBench201.avail_obj_names}
+
+    path = os.path.join(str(tmp_path), "cache.db")
+    bench = _make_bench(PredictionCache(path=path))
+    monkeypatch.setattr(bench, "_run_surrogates", _run_surrogates)
+    results = bench._predict_batch(
+        _make_configs(6, True),
+        epochs=np.asarray([200, 10, 200, 10, 200, 200]),
+        resols=np.ones(6),
+    )
+    assert n_rows == [2]
+    assert results["loss"].tolist() == [200, 10, 200, 10, 200, 200]
+
+    # 1 is the same as True in the space, so the persistent cache hits in a new instance.
+    bench = _make_bench(PredictionCache(path=path))
+    monkeypatch.setattr(bench, "_run_surrogates", _run_surrogates)
+    results = bench._predict_batch(
+        _make_configs(2, 1), epochs=np.asarray([10, 200]), resols=np.ones(2)
+    )
+    assert n_rows == [2]
+    assert results["loss"].tolist() == [10, 200]
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+
+import pytest
+
+from _src._benchmark_fixtures import HPOLIB_DATASET, HPOLIB_EPOCHS
+from chpobench import HPOLib
+
+
+def _make_bench(data_path: str, **kwargs: Any) -> HPOLib:
+    return HPOLib(
+        data_path, HPOLIB_DATASET, quantiles={}, seed=0, rng_mode="counter", **kwargs
+    )
+
+
+def _make_queries(
+    configs: list[dict[str, Any]], n_queries: int = 200
+) -> tuple[list[dict[str, Any]], list[dict[str, int]]]:
+    # Each config appears several times so that the call counts matter.
+    rng = np.random.RandomState(1)
+    indices = rng.randint(len(configs) // 4, size=n_queries)
+    epochs = rng.choice(HPOLIB_EPOCHS, size=n_queries)
+    return [configs[i] for i in indices], [{"epochs": int(e)} for e in epochs]
+
+
+def _to_array(results: list[dict[str, float]]) -> np.ndarray:
+    return np.asarray([[r[name] for name in sorted(r)] for r in results])
+
+
+def _evaluate_trials(
+    bench: HPOLib,
+    configs: list[dict[str, Any]],
+    fidels: list[dict[str, int]],
+    trial_ids: list[int],
+) -> list[dict[str, float]]:
+    return [
+        bench(config, fidel, trial_id=trial_id)
+        for config, fidel, trial_id in zip(configs, fidels, trial_ids)
+    ]
+
+
+@pytest.mark.parametrize("backend", ["dict", "dense"])
+def test_counter_mode_serial_thread_batch(
+    hpolib_data_path: str, hpolib_configs: list[dict[str, Any]], backend: str
+) -> None:
+    configs, fidels = _make_queries(hpolib_configs)
+    bench = _make_bench(hpolib_data_path, backend=backend)
+    serial = _to_array([bench(config, fidel) for config, fidel in zip(configs, fidels)])
+
+    # Only the order of the queries of each config matters, so one thread per config.
+    bench = _make_bench(hpolib_data_path, backend=backend)
+    groups: dict[str, list[int]] = {}
+    for i, config in enumerate(configs):
+        groups.setdefault(repr(sorted(config.items())), []).append(i)
+
+    threaded: list[Any] = [None] * len(configs)
+
+    def _run(indices: list[int]) -> None:
+        for i in indices:
+            threaded[i] = bench(configs[i], fidels[i])
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(_run, groups.values()))
+
+    batch = _make_bench(hpolib_data_path, backend=backend).query_batch(
+        configs, {"epochs": np.asarray([f["epochs"] for f in fidels])}
+    )
+    assert np.array_equal(_to_array(threaded), serial)
+    assert np.array_equal(
+        np.stack([batch[name] for name in sorted(batch)], axis=-1), serial
+    )
+
+
+def test_trial_id_process_pool(
+    hpolib_data_path: str, hpolib_configs: list[dict[str, Any]]
+) -> None:
+    configs, fidels = _make_queries(hpolib_configs)
+    trial_ids = list(range(len(configs)))
+    bench = _make_bench(hpolib_data_path)
+    serial = _to_array(_evaluate_trials(bench, configs, fidels, trial_ids))
+
+    # Each worker evaluates a copy of the same instance in a different order.
+    order = np.random.RandomState(2).permutation(len(configs))
+    chunks = np.array_split(order, 4)
+    parallel: list[Any] = [None] * len(configs)
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(
+                _evaluate_trials,
+                bench,
+                [configs[i] for i in chunk],
+                [fidels[i] for i in chunk],
+                [trial_ids[i] for i in chunk],
+            )
+            for chunk in chunks
+        ]
+        for chunk, future in zip(chunks, futures):
+            for i, result in zip(chunk.tolist(), future.result()):
+                parallel[i] = result
+
+    batch = _make_bench(hpolib_data_path, backend="dense").query_batch(
+        configs[::-1],
+        {"epochs": np.asarray([f["epochs"] for f in fidels[::-1]])},
+        trial_ids=trial_ids[::-1],
+    )
+    assert np.array_equal(_to_array(parallel), serial)
+    assert np.array_equal(
+        np.stack([batch[name] for name in sorted(batch)], axis=-1)[::-1], serial
+    )
+
+
+def test_trial_id_requires_counter_mode(
+    hpolib_data_path: str, hpolib_configs: list[dict[str, Any]]
+) -> None:
+    bench = HPOLib(hpolib_data_path, HPOLIB_DATASET, quantiles={}, seed=0)
+    with pytest.raises(ValueError, match="rng_mode='counter'"):
+        bench(hpolib_configs[0], trial_id=0)
+    with pytest.raises(ValueError, match="rng_mode='counter'"):
+        bench.query_batch(hpolib_configs[:2], trial_ids=[0, 1])
+    with pytest.raises(ValueError, match="shape"):
+        _make_bench(hpolib_data_path).query_batch(hpolib_configs[:2], trial_ids=[0])
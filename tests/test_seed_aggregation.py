@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+import pytest
+
+from _src._benchmark_fixtures import HPOLIB_DATASET
+from chpobench import HPOLib
+
+
+def _make_bench(data_path: str, seed_aggregation: str, **kwargs: Any) -> HPOLib:
+    return HPOLib(
+        data_path,
+        HPOLIB_DATASET,
+        quantiles={},
+        seed=0,
+        seed_aggregation=seed_aggregation,
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("backend", ["dict", "dense", "mmap"])
+def test_all_seeds(
+    hpolib_data_path: str, hpolib_configs: list[dict[str, Any]], backend: str
+) -> None:
+    bench = _make_bench(hpolib_data_path, "all", backend=backend)
+    n_seeds = HPOLib._N_SEEDS
+    results = bench(hpolib_configs[0])
+    assert all(np.shape(vals) == (n_seeds,) for vals in results.values())
+
+    batch = bench.query_batch(hpolib_configs[:4])
+    assert all(np.shape(vals) == (4, n_seeds) for vals in batch.values())
+    for name, vals in results.items():
+        assert np.array_equal(batch[name][0], vals)
+
+    curve = bench.query_curve(hpolib_configs[0], epochs=[10, 100])
+    assert all(np.shape(vals) == (2, n_seeds) for vals in curve.values())
+    for name, vals in results.items():
+        assert np.array_equal(curve[name][-1], vals)
+
+
+@pytest.mark.parametrize("backend", ["dict", "dense", "mmap"])
+@pytest.mark.parametrize("seed_aggregation", ["mean", "median"])
+def test_aggregates_of_all_seeds(
+    hpolib_data_path: str,
+    hpolib_configs: list[dict[str, Any]],
+    backend: str,
+    seed_aggregation: str,
+) -> None:
+    # The dense backend stores the aggregates, which must match those of the seeds.
+    bench = _make_bench(hpolib_data_path, seed_aggregation, backend=backend)
+    all_seeds = _make_bench(hpolib_data_path, "all").query_batch(hpolib_configs[:8])
+    aggregate = np.mean if seed_aggregation == "mean" else np.median
+    batch = bench.query_batch(hpolib_configs[:8])
+    for name, vals in all_seeds.items():
+        assert batch[name] == pytest.approx(aggregate(vals, axis=-1))
+
+    results = bench(hpolib_configs[0])
+    for name, vals in all_seeds.items():
+        assert results[name] == pytest.approx(aggregate(vals[0]))
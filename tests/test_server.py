@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+
+import pytest
+
+from _src._benchmark_fixtures import HPOLIB_DATASET
+from chpobench import HPOLib
+from chpobench.server import BenchClient, BenchServer
+
+
+_AUTHKEY = b"test"
+
+
+class _StubBench:
+    def __call__(
+        self,
+        config: dict[str, Any],
+        fidels: dict[str, Any] | None = None,
+        trial_id: int | None = None,
+    ) -> dict[str, Any]:
+        time.sleep(config.get("sleep", 0.0))
+        if config.get("unpicklable", False):
+            return {"loss": lambda: 0.0}
+
+        return {"loss": config["loss"]}
+
+    def query_batch(
+        self,
+        configs: list[dict[str, Any]],
+        fidels: dict[str, Any] | None = None,
+        trial_ids: np.ndarray | None = None,
+    ) -> dict[str, np.ndarray]:
+        if any(config.get("broken", False) for config in configs):
+            # Too few rows break the merge of the single calls.
+            return {"loss": np.zeros(0)}
+
+        # Fall back to __call__ for each config.
+        raise NotImplementedError
+
+
+@pytest.fixture
+def server(tmp_path: Any, hpolib_data_path: str) -> Any:
+    benches = {
+        "stub": _StubBench(),
+        "hpolib": HPOLib(hpolib_data_path, HPOLIB_DATASET, quantiles={}, seed=0),
+        "all_seeds": HPOLib(
+            hpolib_data_path,
+            HPOLIB_DATASET,
+            quantiles={},
+            seed=0,
+            seed_aggregation="all",
+        ),
+        "counter": HPOLib(
+            hpolib_data_path, HPOLIB_DATASET, quantiles={}, seed=0, rng_mode="counter"
+        ),
+    }
+    server = BenchServer(
+        benches,  # type: ignore[arg-type]
+        address=os.path.join(str(tmp_path), "sock"),
+        authkey=_AUTHKEY,
+    )
+    server.start()
+    yield server
+    server.close()
+
+
+def test_errors_do_not_stop_server(
+    server: BenchServer, hpolib_configs: list[dict[str, Any]]
+) -> None:
+    stub = BenchClient(server.address, _AUTHKEY, "stub", timeout=5.0)
+    with pytest.raises(IndexError):
+        stub({"broken": True})
+    with pytest.raises(RuntimeError, match="Failed to pickle"):
+        stub({"unpicklable": True})
+
+    hpolib = BenchClient(server.address, _AUTHKEY, "hpolib", timeout=5.0)
+    assert set(hpolib(hpolib_configs[0])) == set(HPOLib.avail_obj_names)
+    assert hpolib.avail_constraint_names == HPOLib.avail_constraint_names
+    assert hpolib.directions == HPOLib.directions
+
+
+def test_client_timeout(server: BenchServer) -> None:
+    client = BenchClient(server.address, _AUTHKEY, "stub", timeout=0.1)
+    with pytest.raises(TimeoutError):
+        client({"loss": 1.0, "sleep": 0.5})
+
+
+def test_trial_ids(
+    server: BenchServer, hpolib_data_path: str, hpolib_configs: list[dict[str, Any]]
+) -> None:
+    # The served results must match a direct instance with the same seed and trial ids.
+    bench = HPOLib(
+        hpolib_data_path,
+        HPOLIB_DATASET,
+        quantiles={},
+        seed=0,
+        rng_mode="counter",
+    )
+    configs = hpolib_configs[:8] * 2
+    trial_ids = list(range(len(configs)))[::-1]
+    expected = [bench(c, trial_id=t) for c, t in zip(configs, trial_ids)]
+
+    # Concurrent calls are merged into one batch in the server.
+    client = BenchClient(server.address, _AUTHKEY, "counter", timeout=5.0)
+    with ThreadPoolExecutor(max_workers=len(configs)) as executor:
+        served = list(
+            executor.map(
+                lambda args: client(args[0], trial_id=args[1]), zip(configs, trial_ids)
+            )
+        )
+    assert served == expected
+
+    batch = client.query_batch(configs, trial_ids=trial_ids)
+    assert [dict(zip(batch, vals)) for vals in zip(*batch.values())] == expected
+
+
+def test_all_seeds(
+    server: BenchServer, hpolib_data_path: str, hpolib_configs: list[dict[str, Any]]
+) -> None:
+    bench = HPOLib(
+        hpolib_data_path, HPOLIB_DATASET, quantiles={}, seed=0, seed_aggregation="all"
+    )
+    client = BenchClient(server.address, _AUTHKEY, "all_seeds", timeout=5.0)
+    results = client(hpolib_configs[0])
+    expected = bench(hpolib_configs[0])
+    assert set(results) == set(expected)
+    for name, vals in results.items():
+        assert np.array_equal(vals, expected[name])
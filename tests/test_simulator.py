@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from _src._benchmark_fixtures import HPOLIB_DATASET
+from chpobench import HPOLib
+from chpobench.simulator import AsyncSimulator, Trial
+
+
+class _CycleOptimizer:
+    def __init__(self, configs: list[dict[str, Any]]):
+        self._configs = configs
+        self._n_asks = 0
+
+    def ask(self) -> tuple[dict[str, Any], dict[str, int | float] | None]:
+        config = self._configs[self._n_asks % len(self._configs)]
+        self._n_asks += 1
+        return config, {"epochs": 10 * (1 + self._n_asks % 3)}
+
+    def tell(self, trial: Trial) -> None:
+        pass
+
+
+def _make_bench(data_path: str) -> HPOLib:
+    return HPOLib(data_path, HPOLIB_DATASET, quantiles={}, seed=0, rng_mode="counter")
+
+
+@pytest.mark.parametrize("min_batch_size", [1, 1000])
+def test_trial_ids(
+    hpolib_data_path: str, hpolib_configs: list[dict[str, Any]], min_batch_size: int
+) -> None:
+    simulator = AsyncSimulator(
+        _make_bench(hpolib_data_path), n_workers=8, min_batch_size=min_batch_size
+    )
+    trials = simulator.run(_CycleOptimizer(hpolib_configs[:4]), n_trials=32)
+    assert len(trials) == 32
+
+    # Each trial is seeded by its trial id, so a direct query with the same id matches it.
+    bench = _make_bench(hpolib_data_path)
+    for trial in trials:
+        assert trial.results == bench(
+            trial.config, trial.fidels, trial_id=trial.trial_id
+        )
+
+
+def test_rejects_all_seeds(hpolib_data_path: str) -> None:
+    bench = HPOLib(
+        hpolib_data_path, HPOLIB_DATASET, quantiles={}, seed=0, seed_aggregation="all"
+    )
+    with pytest.raises(ValueError, match="seed_aggregation='all'"):
+        AsyncSimulator(bench, n_workers=4)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+import pytest
+
+from _src._benchmark_fixtures import HPOLIB_DATASET
+from chpobench import HPOLib
+from chpobench.base import IntDistributionParams
+
+
+def test_int_contains_batch() -> None:
+    param = IntDistributionParams(name="epochs", lower=1, upper=100)
+    mask = param.contains_batch(np.asarray([1, 10.0, 10.7, 0, 100, 101]))
+    assert mask.tolist() == [True, True, False, False, True, False]
+
+
+@pytest.mark.parametrize("backend", ["dict", "dense", "mmap"])
+def test_fractional_epochs_in_batch(
+    hpolib_data_path: str, hpolib_configs: list[dict[str, Any]], backend: str
+) -> None:
+    bench = HPOLib(
+        hpolib_data_path, HPOLIB_DATASET, quantiles={}, seed=0, backend=backend
+    )
+    with pytest.raises(ValueError, match="epochs"):
+        bench.query_batch(hpolib_configs[:2], {"epochs": np.asarray([10.7, 10])})
+
+
+@pytest.mark.parametrize("backend", ["dict", "dense", "mmap"])
+@pytest.mark.parametrize("trust_input", [False, True])
+def test_fractional_epochs_are_not_truncated(
+    hpolib_data_path: str,
+    hpolib_configs: list[dict[str, Any]],
+    backend: str,
+    trust_input: bool,
+) -> None:
+    bench = HPOLib(
+        hpolib_data_path,
+        HPOLIB_DATASET,
+        quantiles={},
+        seed=0,
+        backend=backend,
+        trust_input=trust_input,
+    )
+    with pytest.raises(ValueError, match="epochs"):
+        bench(hpolib_configs[0], {"epochs": 10.7})
+    with pytest.raises(ValueError, match="epochs"):
+        bench.query_batch(hpolib_configs[:2], {"epochs": np.asarray([10.7, 10])})
+    with pytest.raises(ValueError, match="epochs"):
+        bench.query_curve(hpolib_configs[0], epochs=[10, 10.5])
+
+    # Integral floats are the same as the integers.
+    assert bench.query_curve(hpolib_configs[0], epochs=[10.0, 50.0])["loss"].shape == (
+        2,
+    )